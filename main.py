@@ -1,13 +1,18 @@
 import time
 import logging
+import argparse
 from source.utils.log_setup import setup_log
 from source.context import Context
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='从 output/ 中的检查点恢复，跳过已完成的日期')
+    args = parser.parse_args()
+
     st = time.time()
     try:
         logger = setup_log(log_dir='output/')
-        context = Context()
+        context = Context(resume=args.resume)
         context.run()
 
         logging.info("Total running time: {}".format(time.time() - st))
@@ -28,6 +28,31 @@ with st.expander("📥 输入文件说明：global_param.csv"):
 | 边损上限     | 大于该值视为余量             | double | 无     | 需考虑余量下限            |
 | 余量下限     | 非边损可补库的剩余长度       | double | 无     | 补库判断阈值              |
 | 切割方案使用下限 | 某种切割方案至少用几次     | int    | 0      | 防止极端解                |
+| 主问题增量更新 | 主问题只建一次，每轮只追加新列 | string | 否 | 是表示复用主问题模型      |
+| 子问题求解方式 | 整数规划 或 分支定界         | string | 整数规划 | 分支定界不调用求解器    |
+| 每轮生成列数 | 子问题每轮最多加入的改进方案数 | int | 1 | 仅分支定界支持大于1      |
+| 并行进程数 | 各日期列生成并行求解的进程数 | int | 1 | 1 表示顺序求解，-1 表示全部核 |
+| 是否复用切割方案 | 用之前日期找到的方案作为初始列 | string | 否 | 按原始宽度、刀数、边损参数分组 |
+| 切割方案缓存文件 | 方案池在多次运行之间的保存路径 | string | 无 | 为空则不保存          |
+| 取整启发式容差 | 取整解与线性下界相差不超过该卷数时跳过整数规划 | double | 无 | 为空则总是求解整数规划 |
+| 求解器 | 主问题、子问题与原问题使用的求解器 | string | glpk | 如 appsi_highs、cbc、gurobi_persistent，不可用时回退 glpk |
+| 换刀优化时间上限 | 换刀顺序 2-opt/Or-opt 改进的时间上限（秒） | double | 1 | 越大排序越优 |
+| 精确换刀排序上限 | 方案数不超过该值时用动态规划求最优换刀顺序 | int | 15 | 0 表示总是用启发式 |
+| 是否优化换刀顺序 | 后处理时按最少换刀次数对方案重新排序编号 | string | 否 | 在补库之后执行 |
+| 列生成最大迭代次数 | 每个日期列生成的迭代次数上限 | int | 无 | 为空则迭代至无改进列 |
+| 列生成时间上限 | 每个日期列生成的时间上限（秒） | double | 无 | 为空则不限时 |
+| 下界提前终止 | Farley 下界向上取整等于主问题目标值向上取整时停止 | string | 否 | 是表示启用 |
+| 对偶稳定方法 | 无、平滑 或 盒子 | string | 无 | 减少对偶值振荡与拖尾 |
+| 对偶平滑系数 | 平滑时稳定中心的权重 | double | 0.5 | 0 到 1 之间 |
+| 对偶盒子半径 | 盒子时对偶值偏离稳定中心的上限 | double | 0.1 | 越小越稳定 |
+| 初始方案生成方式 | 单一幅宽 或 贪心 | string | 单一幅宽 | 贪心加入切满和 FFD 混合方案，减少迭代次数 |
+| 方案老化轮数 | 连续多少轮在主问题中取值为 0 的方案被移除 | int | 无 | 为空则不移除，初始方案不移除 |
+| 是否多日联合求解 | 按窗口把多个日期放在一个列生成模型中求解，允许提前生产 | string | 否 | 支持主问题增量更新与取整启发式容差，不使用对偶稳定与方案老化 |
+| 联合求解窗口日期数 | 每个联合求解窗口包含的日期个数 | int | 3 | 越大越优但模型越大 |
+| 库存持有成本 | 每件提前一个日期生产的成本（卷） | double | 0.001 | 越大越倾向当天生产 |
+| 输出文件格式 | csv、parquet 或 feather | string | csv | parquet 与 feather 需要安装 pyarrow |
+| 是否保存检查点 | 每个日期完成后把该日期的增量追加到输出目录的 checkpoint.pkl.gz | string | 否 | 配合 main.py --resume 跳过已完成日期 |
+| 是否增量求解 | 复用上次运行中剩余需求与参数都未变化的日期的解 | string | 否 | 解缓存保存在输出目录 solution_cache.pkl.gz |
 """)
 
 with st.expander("📥 输入文件说明：demand.csv"):
@@ -36,7 +61,7 @@ with st.expander("📥 输入文件说明：demand.csv"):
 |------------|--------------------|--------|-----------|------------------|
 | 幅宽       | 客户所需纸卷宽度   | double | ✅        | 单位 mm          |
 | 订单件数   | 每种幅宽的需求数量 | double | ✅        | 每天若干行       |
-| 移库日期   | 该需求所属日期     | string | ✅        | 支持多天数据     |
+| 移库日期   | 该需求所属日期     | string | ✅        | 支持多天数据，如 2024/2/13 或 2024-02-13 |
 """)
 
 st.markdown("---")
@@ -61,7 +86,9 @@ with st.expander("📊 输出文件说明：kpiOut.csv（关键指标）"):
 | 日期             | 哪天的结果               | string |
 | 原始纸卷使用个数 | 共用了多少根母卷         | int    |
 | 切割方案数量     | 该日使用了多少种方案     | int    |
+| 换刀次数         | 按方案编码顺序生产的总换刀次数，优化换刀顺序时输出 | int |
 | 运行时间（秒）   | 算法运行耗时             | double |
+| 列生成时长（秒） 等 | 列生成、原问题、供需匹配及各后处理阶段的耗时 | double |
 """)
 
 with st.expander("📦 输出文件说明：supplyOut.csv / demandOut.csv / fulfillmentOut.csv"):
@@ -69,6 +96,9 @@ with st.expander("📦 输出文件说明：supplyOut.csv / demandOut.csv / fulf
 - `supplyOut.csv`：每种方案每种宽度的供给数量
 - `demandOut.csv`：每天每种宽度的实际需求与未满足数
 - `fulfillmentOut.csv`：哪个方案在什么日期供给了哪个需求
+- `convergenceOut.csv`：每个日期列生成每轮的主问题目标值、下界、耗时与方案数
+
+各输出文件中的日期统一为 ISO 格式（如 2024-02-13），与输入中移库日期的写法无关。
 
 这些用于分析方案对需求的满足匹配情况，可用于生成追踪表、KPI 和图示。
 """)
@@ -132,7 +162,8 @@ if st.button("🚀 运行算法"):
         "solutionOut.csv": "切割方案 (solutionOut.csv)",
         "supplyOut.csv": "供给结果 (supplyOut.csv)",
         "demandOut.csv": "需求满足情况 (demandOut.csv)",
-        "fulfillmentOut.csv": "供需匹配 (fulfillmentOut.csv)"
+        "fulfillmentOut.csv": "供需匹配 (fulfillmentOut.csv)",
+        "convergenceOut.csv": "列生成收敛过程 (convergenceOut.csv)"
     }
 
     # 展示输出文件
@@ -0,0 +1,513 @@
+import datetime
+import math
+import logging
+import time
+from typing import Dict, Union, List, Set
+from .input_data import InputData
+from .utils.init_pattern import init_pattern
+from .model.original_problem import OriginalProblem
+from .model.master_problem import MasterProblem
+from .model.horizon_master_problem import HorizonMasterProblem
+from .model.horizon_original_problem import HorizonOriginalProblem
+from .model.sub_problem import SubProblem
+from .model.knapsack_sub_problem import KnapsackSubProblem
+from .utils.pattern_update import pattern_update, remove_aged_pattern
+from .utils.rounding import round_lp_solution
+from .utils.dual_stabilizer import DualStabilizer
+from .utils.cut_rule import CutRule
+from .utils import field
+from .utils import header
+from .utils import timing
+from . import do
+
+
+class ColumnGenerationResult:
+    """
+    单个日期列生成 + 原问题求解的结果，只包含可序列化的轻量数据，便于从子进程返回
+    """
+
+    def __init__(self, date: datetime.date, solution: list, running_time: float, mode_list: List[Dict[float, float]],
+                 stage_time_dict: Dict[str, float] = None, profiler: timing.Profiler = None,
+                 convergence_list: List[dict] = None, size_list: List[float] = None):
+        self.date = date
+        self.solution = solution
+        self.running_time = running_time
+        self.mode_list = mode_list
+        self.stage_time_dict = stage_time_dict if stage_time_dict is not None else dict()
+        # 子进程中的耗时记录，由主进程合并
+        self.profiler = profiler
+        # 列生成每轮迭代的收敛记录
+        self.convergence_list = convergence_list if convergence_list is not None else []
+        # solution 中各幅宽段数对应的幅宽顺序，为 None 时与该日期的需求顺序一致
+        self.size_list = size_list
+
+
+class ColumnGeneration:
+    """
+    单个日期的列生成：反复求解主问题和子问题直至无改进列，再求解原问题
+    """
+
+    def __init__(self, input_data: InputData, date: datetime.date, seed_mode_list: List[Dict[float, int]] = None):
+        self.input_data = input_data
+        self.date = date
+        self.seed_mode_list = seed_mode_list if seed_mode_list is not None else []
+        self.demand_dict: Dict[float, do.Demand] = input_data.demand_dict[date]
+        self.pattern_dict: Dict[int, do.Pattern] = dict()
+        self.pattern_key_set: Set[tuple] = set()
+        # {pattern_id：连续在主问题中取值为 0 的轮数}
+        self.pattern_age_dict: Dict[int, int] = dict()
+
+        self.master_problem: MasterProblem = None
+        self.sub_problem: Union[SubProblem, KnapsackSubProblem] = None
+        self.original_problem: OriginalProblem = None
+        self.iteration = 0
+        self.master_obj: float = None
+        self.convergence_list: List[dict] = []
+        self.stabilizer: DualStabilizer = None
+
+    def run(self) -> ColumnGenerationResult:
+        logging.info("start solving for date: {}".format(self.date))
+        okh = header.OutKpiHeader
+        start = time.time()
+
+        st = time.perf_counter()
+        self.generate_patterns()
+        column_generation_time = time.perf_counter() - st
+
+        st = time.perf_counter()
+        og_obj, solution = self.solve_original_problem()
+        original_problem_time = time.perf_counter() - st
+
+        return ColumnGenerationResult(
+            date=self.date,
+            solution=solution,
+            running_time=time.time() - start,
+            mode_list=[pattern.mode for pattern in self.pattern_dict.values()],
+            stage_time_dict={
+                okh.column_generation_time: column_generation_time,
+                okh.original_problem_time: original_problem_time
+            },
+            convergence_list=self.convergence_list
+        )
+
+    def generate_patterns(self):
+        input_data = self.input_data
+        demand_dict = self.demand_dict
+        size_list = [d for d in demand_dict]
+        self.pattern_dict = init_pattern(demand_dict=demand_dict, og_size=input_data.original_size,
+                                         method=input_data.init_pattern_method,
+                                         cut_rule=CutRule(input_data=input_data))
+        self.pattern_key_set = {pattern.key for pattern in self.pattern_dict.values()}
+        # 初始方案保证主问题可行，不参与老化移除
+        protected_id_set = set(self.pattern_dict)
+        if self.seed_mode_list:
+            # 用方案池中的历史方案作为初始列
+            pattern_update(pattern_dict=self.pattern_dict, size_list=size_list,
+                           new_column_list=[[mode.get(size, 0) for size in size_list]
+                                            for mode in self.seed_mode_list],
+                           original_size=input_data.original_size,
+                           pattern_key_set=self.pattern_key_set)
+            logging.info("seeded patterns from pool: {}".format(len(self.seed_mode_list)))
+        self.pattern_age_dict = {pattern_id: 0 for pattern_id in self.pattern_dict}
+
+        self.stabilizer = DualStabilizer(input_data=input_data,
+                                         demand_list=[demand.amount for demand in demand_dict.values()])
+        start = time.perf_counter()
+        improvable = True
+        self.iteration = 0
+        self.convergence_list = []
+        self.master_problem = None
+        while improvable:
+            st = time.perf_counter()
+            # 主问题增量更新时只建一次，之后每轮只追加新列；移除方案后需要重建
+            if not input_data.persistent_master or self.master_problem is None:
+                self.master_problem = MasterProblem(demand_dict=demand_dict, pattern_dict=self.pattern_dict,
+                                                    solver_name=input_data.solver_name)
+                self.master_problem.build_model()
+            master_obj, duals = self.master_problem.solve_model()
+            self.master_obj = master_obj
+            master_time = time.perf_counter() - st
+
+            st = time.perf_counter()
+            column_list = self.price_with_stabilization(duals=duals)
+            sub_obj = column_list[0][0]
+            pricing_time = time.perf_counter() - st
+            logging.info("sub_obj: {}".format(sub_obj))
+
+            improvable = sub_obj > 1 + 1e-8
+            if improvable:
+                new_column_list = [column for (obj, column, remain) in column_list if obj > 1 + 1e-8]
+            else:
+                new_column_list = [column_list[0][1]]
+
+            new_pattern_list = pattern_update(pattern_dict=self.pattern_dict, size_list=size_list,
+                                              new_column_list=new_column_list,
+                                              original_size=input_data.original_size,
+                                              pattern_key_set=self.pattern_key_set)
+            if improvable and not new_pattern_list:
+                logging.warning("improving columns already exist at iteration {}, stop.".format(self.iteration))
+                improvable = False
+            if input_data.persistent_master and improvable:
+                for new_pattern in new_pattern_list:
+                    self.master_problem.add_pattern(new_pattern)
+            if improvable and input_data.pattern_age_limit is not None:
+                self.update_pattern_age(new_pattern_list=new_pattern_list, protected_id_set=protected_id_set)
+            self.iteration += 1
+
+            if self.stabilizer.enabled:
+                lower_bound = self.stabilizer.best_bound
+            else:
+                lower_bound = self.get_lower_bound(master_obj=master_obj, sub_obj=sub_obj)
+            self.record_iteration(master_obj=master_obj, sub_obj=sub_obj, lower_bound=lower_bound,
+                                  master_time=master_time, pricing_time=pricing_time,
+                                  new_column_num=len(new_pattern_list) if improvable else 0)
+            if improvable:
+                stop_reason = self.get_stop_reason(master_obj=master_obj, lower_bound=lower_bound,
+                                                   elapsed_time=time.perf_counter() - start)
+                if stop_reason is not None:
+                    logging.info("stop column generation early for date {}: {}".format(self.date, stop_reason))
+                    improvable = False
+
+        logging.info("Iterations: {}".format(self.iteration))
+
+    def update_pattern_age(self, new_pattern_list: List[do.Pattern], protected_id_set: Set[int]):
+        """
+        更新各方案连续在主问题中取值为 0 的轮数，移除超过 方案老化轮数 的方案；
+        移除后主问题需要重建
+        """
+        x_dict = self.master_problem.get_x_dict()
+        for pattern_id, value in x_dict.items():
+            if pattern_id in self.pattern_age_dict:
+                self.pattern_age_dict[pattern_id] = 0 if value > 1e-6 else self.pattern_age_dict[pattern_id] + 1
+        for new_pattern in new_pattern_list:
+            self.pattern_age_dict[new_pattern.pattern_id] = 0
+
+        removed_id_list = remove_aged_pattern(
+            pattern_dict=self.pattern_dict,
+            pattern_age_dict=self.pattern_age_dict,
+            age_limit=self.input_data.pattern_age_limit,
+            protected_id_set=protected_id_set,
+            pattern_key_set=self.pattern_key_set
+        )
+        if removed_id_list:
+            logging.info("removed aged patterns: {}".format(len(removed_id_list)))
+            self.master_problem = None
+
+    @staticmethod
+    def get_lower_bound(master_obj: float, sub_obj: float) -> float:
+        """
+        Farley 下界：任一可行列的对偶价值不超过 sub_obj，故线性松弛最优值不小于 master_obj / sub_obj
+        """
+        return master_obj / max(sub_obj, 1.0)
+
+    def record_iteration(self, master_obj: float, sub_obj: float, lower_bound: float,
+                         master_time: float, pricing_time: float, new_column_num: int):
+        och = header.OutConvergenceHeader
+        self.convergence_list.append({
+            och.date: self.date,
+            och.iteration: self.iteration,
+            och.master_obj: master_obj,
+            och.sub_obj: sub_obj,
+            och.lower_bound: lower_bound,
+            och.master_time: master_time,
+            och.pricing_time: pricing_time,
+            och.column_num: len(self.pattern_dict),
+            och.new_column_num: new_column_num
+        })
+
+    def get_stop_reason(self, master_obj: float, lower_bound: float, elapsed_time: float) -> Union[str, None]:
+        """
+        检查 global_params.csv 中配置的提前终止条件
+        :return: 终止原因，不满足任何条件时返回 None
+        """
+        input_data = self.input_data
+        if input_data.cg_max_iteration is not None and self.iteration >= input_data.cg_max_iteration:
+            return "reached max iteration {}".format(input_data.cg_max_iteration)
+        if input_data.cg_time_limit is not None and elapsed_time >= input_data.cg_time_limit:
+            return "reached time limit {}s".format(input_data.cg_time_limit)
+        # 下界向上取整已等于主问题目标值向上取整，继续迭代不会再改进整数下界
+        if input_data.cg_bound_stop and lower_bound is not None and math.ceil(lower_bound - 1e-6) >= math.ceil(master_obj - 1e-6):
+            return "lower bound {} proves rounded-up optimum {}".format(lower_bound, math.ceil(master_obj - 1e-6))
+        return None
+
+    def price(self, duals: List[float]) -> List[tuple]:
+        self.sub_problem = self.create_sub_problem(duals=duals)
+        self.sub_problem.build_model()
+        return self.sub_problem.solve_top_k(k=self.input_data.column_num_per_iteration)
+
+    def price_with_stabilization(self, duals: List[float]) -> List[tuple]:
+        """
+        用稳定后的对偶值定价，再按主问题对偶值重新计算各列的价值；
+        若没有列在主问题对偶值下可改进（mis-pricing），则直接用主问题对偶值重新定价
+        :param duals: 主问题对偶值
+        :return: [(主问题对偶值下的价值, column, remain)]，按价值从大到小排列
+        """
+        separation_duals = self.stabilizer.get_separation_duals(duals=duals)
+        column_list = self.price(duals=separation_duals)
+        self.stabilizer.update(duals=separation_duals, sub_obj=column_list[0][0])
+        if separation_duals == list(duals):
+            return column_list
+
+        column_list = sorted(
+            [(sum(d * a for d, a in zip(duals, column)), column, remain) for (obj, column, remain) in column_list],
+            key=lambda x: x[0], reverse=True
+        )
+        if column_list[0][0] <= 1 + 1e-8:
+            logging.info("mis-pricing at iteration {}, price with master duals.".format(self.iteration))
+            column_list = self.price(duals=duals)
+            self.stabilizer.update(duals=duals, sub_obj=column_list[0][0])
+        return column_list
+
+    def create_sub_problem(self, duals: List[float]) -> Union[SubProblem, KnapsackSubProblem]:
+        sub_problem_cls = KnapsackSubProblem \
+            if self.input_data.sub_problem_method == field.SubProblemMethod.branch_bound else SubProblem
+        return sub_problem_cls(
+            input_data=self.input_data,
+            duals=duals,
+            demand_dict=self.demand_dict
+        )
+
+    def solve_original_problem(self):
+        input_data = self.input_data
+        self.original_problem = OriginalProblem(
+            demand_dict=self.demand_dict
+            , pattern_dict=self.pattern_dict
+            , min_pattern_used_num=input_data.min_pattern_used_num
+            , solver_name=input_data.solver_name
+        )
+
+        self.original_problem.build_model()
+
+        # 线性松弛取整，得到初始可行解；松弛目标值向上取整是原问题的下界
+        lp_obj, lp_x_dict = self.original_problem.solve_relaxation()
+        incumbent = round_lp_solution(
+            demand_dict=self.demand_dict,
+            pattern_dict=self.pattern_dict,
+            lp_x_dict=lp_x_dict,
+            min_pattern_used_num=input_data.min_pattern_used_num,
+            max_pattern_used_num=self.original_problem.max_pattern_used_num
+        )
+        if incumbent is None:
+            logging.warning("rounding found no feasible solution within the pattern usage limit.")
+            return self.original_problem.solve_model()
+        incumbent_obj = sum(incumbent.values())
+        lower_bound = math.ceil(lp_obj - 1e-6)
+        logging.info("master obj: {}, relaxation obj: {}, rounding incumbent: {}".format(
+            self.master_obj, lp_obj, incumbent_obj))
+
+        if input_data.rounding_gap_tolerance is not None \
+                and incumbent_obj - lower_bound <= input_data.rounding_gap_tolerance + 1e-6:
+            logging.info("rounding gap {} within tolerance, skip MIP.".format(incumbent_obj - lower_bound))
+            return incumbent_obj, self.original_problem.get_cut_used(x_dict=incumbent)
+
+        return self.original_problem.solve_model(incumbent=incumbent)
+
+
+class HorizonColumnGeneration(ColumnGeneration):
+    """
+    多日联合列生成：窗口内各日期共享方案池，每轮分别用各日期产出约束的对偶值定价，
+    允许提前生产并结转到之后的日期
+    """
+
+    def __init__(self, input_data: InputData, date_list: List[datetime.date],
+                 seed_mode_list: List[Dict[float, int]] = None):
+        super(HorizonColumnGeneration, self).__init__(input_data=input_data, date=date_list[0],
+                                                      seed_mode_list=seed_mode_list)
+        self.date_list = date_list
+        self.date_demand_dict: Dict[datetime.date, Dict[float, do.Demand]] = {
+            date: input_data.demand_dict[date] for date in date_list
+        }
+        # 窗口内各幅宽的总需求，决定幅宽顺序
+        total_amount_dict = dict()
+        for date in date_list:
+            for size, demand in input_data.demand_dict[date].items():
+                total_amount_dict[size] = total_amount_dict.get(size, 0) + demand.amount
+        self.demand_dict = {
+            size: do.Demand(date=date_list[0], size=size, amount=amount)
+            for size, amount in sorted(total_amount_dict.items())
+        }
+        self.size_list = list(self.demand_dict)
+
+    def run(self) -> List[ColumnGenerationResult]:
+        logging.info("start solving for dates: {}".format(self.date_list))
+        okh = header.OutKpiHeader
+        start = time.time()
+
+        st = time.perf_counter()
+        self.generate_patterns()
+        column_generation_time = time.perf_counter() - st
+
+        st = time.perf_counter()
+        og_obj, solution_dict = self.solve_original_problem()
+        original_problem_time = time.perf_counter() - st
+
+        # 窗口的耗时平均分摊到各日期，收敛记录与方案池只随第一个日期返回
+        date_num = len(self.date_list)
+        running_time = time.time() - start
+        return [
+            ColumnGenerationResult(
+                date=date,
+                solution=solution_dict[date],
+                running_time=running_time / date_num,
+                mode_list=[pattern.mode for pattern in self.pattern_dict.values()] if k == 0 else [],
+                stage_time_dict={
+                    okh.column_generation_time: column_generation_time / date_num,
+                    okh.original_problem_time: original_problem_time / date_num
+                },
+                convergence_list=self.convergence_list if k == 0 else [],
+                size_list=self.size_list
+            )
+            for k, date in enumerate(self.date_list)
+        ]
+
+    def create_master_problem(self) -> HorizonMasterProblem:
+        master_problem = HorizonMasterProblem(
+            date_demand_dict=self.date_demand_dict,
+            demand_dict=self.demand_dict,
+            pattern_dict=self.pattern_dict,
+            holding_cost=self.input_data.holding_cost,
+            solver_name=self.input_data.solver_name
+        )
+        master_problem.build_model()
+        return master_problem
+
+    def generate_patterns(self):
+        input_data = self.input_data
+        self.pattern_dict = init_pattern(demand_dict=self.demand_dict, og_size=input_data.original_size,
+                                         method=input_data.init_pattern_method,
+                                         cut_rule=CutRule(input_data=input_data))
+        self.pattern_key_set = {pattern.key for pattern in self.pattern_dict.values()}
+        if self.seed_mode_list:
+            pattern_update(pattern_dict=self.pattern_dict, size_list=self.size_list,
+                           new_column_list=[[mode.get(size, 0) for size in self.size_list]
+                                            for mode in self.seed_mode_list],
+                           original_size=input_data.original_size,
+                           pattern_key_set=self.pattern_key_set)
+
+        start = time.perf_counter()
+        improvable = True
+        self.iteration = 0
+        self.convergence_list = []
+        self.master_problem = None
+        while improvable:
+            # 主问题增量更新时只建一次，之后每轮只追加新列
+            st = time.perf_counter()
+            if not input_data.persistent_master or self.master_problem is None:
+                self.master_problem = self.create_master_problem()
+            master_obj, duals_by_date = self.master_problem.solve_model()
+            self.master_obj = master_obj
+            master_time = time.perf_counter() - st
+
+            st = time.perf_counter()
+            column_list = []
+            for date in self.date_list:
+                column_list += self.price(duals=duals_by_date[date])
+            column_list.sort(key=lambda x: x[0], reverse=True)
+            sub_obj = column_list[0][0]
+            pricing_time = time.perf_counter() - st
+            logging.info("sub_obj: {}".format(sub_obj))
+
+            improvable = sub_obj > 1 + 1e-8
+            new_pattern_list = []
+            if improvable:
+                new_pattern_list = pattern_update(
+                    pattern_dict=self.pattern_dict, size_list=self.size_list,
+                    new_column_list=[column for (obj, column, remain) in column_list if obj > 1 + 1e-8],
+                    original_size=input_data.original_size,
+                    pattern_key_set=self.pattern_key_set
+                )
+                if not new_pattern_list:
+                    logging.warning("improving columns already exist at iteration {}, stop.".format(self.iteration))
+                    improvable = False
+                if input_data.persistent_master:
+                    for new_pattern in new_pattern_list:
+                        self.master_problem.add_pattern(new_pattern)
+            self.iteration += 1
+
+            # 各日期分别定价时没有简单的 Farley 下界，不记录下界，也不使用下界提前终止
+            self.record_iteration(master_obj=master_obj, sub_obj=sub_obj, lower_bound=None,
+                                  master_time=master_time, pricing_time=pricing_time,
+                                  new_column_num=len(new_pattern_list))
+            if improvable:
+                stop_reason = self.get_stop_reason(master_obj=master_obj, lower_bound=None,
+                                                   elapsed_time=time.perf_counter() - start)
+                if stop_reason is not None:
+                    logging.info("stop column generation early for dates {}: {}".format(self.date_list, stop_reason))
+                    improvable = False
+
+        # 加入了新列但未重新求解时，重新求解一次以得到取整用的线性解
+        if new_pattern_list:
+            if not input_data.persistent_master:
+                self.master_problem = self.create_master_problem()
+            self.master_obj, _ = self.master_problem.solve_model()
+        logging.info("Iterations: {}".format(self.iteration))
+
+    def solve_original_problem(self):
+        input_data = self.input_data
+        self.original_problem = HorizonOriginalProblem(
+            date_demand_dict=self.date_demand_dict,
+            demand_dict=self.demand_dict,
+            pattern_dict=self.pattern_dict,
+            min_pattern_used_num=input_data.min_pattern_used_num,
+            holding_cost=input_data.holding_cost,
+            solver_name=input_data.solver_name
+        )
+        self.original_problem.build_model()
+
+        # 线性解向上取整一定可行：产出只增不减，原有流量仍满足需求；
+        # 流量不变时持有成本不变，取整解与线性解的目标差即为卷数差，线性解卷数向上取整作为下界
+        lp_x_dict = self.master_problem.get_x_dict()
+        incumbent = dict()
+        for (j, s), value in lp_x_dict.items():
+            if value < 1e-6:
+                continue
+            times = math.ceil(value - 1e-6)
+            if input_data.min_pattern_used_num is not None:
+                times = max(times, input_data.min_pattern_used_num)
+            incumbent[(j, s)] = times
+        incumbent_obj = sum(incumbent.values())
+        lower_bound = math.ceil(sum(lp_x_dict.values()) - 1e-6)
+        logging.info("horizon master obj: {}, rounding incumbent: {}".format(self.master_obj, incumbent_obj))
+
+        max_used = self.original_problem.max_pattern_used_num
+        if max_used is not None and any(times > max_used for times in incumbent.values()):
+            logging.warning("rounding incumbent exceeds the pattern usage limit {}.".format(max_used))
+            return self.original_problem.solve_model()
+
+        if input_data.rounding_gap_tolerance is not None \
+                and incumbent_obj - lower_bound <= input_data.rounding_gap_tolerance + 1e-6:
+            logging.info("rounding gap {} within tolerance, skip MIP.".format(incumbent_obj - lower_bound))
+            return incumbent_obj, self.original_problem.get_cut_used_by_date(x_dict=incumbent)
+
+        return self.original_problem.solve_model(incumbent=incumbent)
+
+
+def solve_date(
+        input_data: InputData,
+        date: datetime.date,
+        seed_mode_list: List[Dict[float, int]] = None
+) -> ColumnGenerationResult:
+    """
+    进程池的入口函数，input_data 应为 InputData.payload_for_date 生成的轻量副本
+    """
+    profiler = timing.Profiler()
+    with timing.use_profiler(profiler), timing.date_scope(date):
+        result = ColumnGeneration(input_data=input_data, date=date, seed_mode_list=seed_mode_list).run()
+    result.profiler = profiler
+    return result
+
+
+def solve_window(
+        input_data: InputData,
+        date_list: List[datetime.date],
+        seed_mode_list: List[Dict[float, int]] = None
+) -> List[ColumnGenerationResult]:
+    """
+    多日联合求解时进程池的入口函数，input_data 应为 InputData.payload_for_dates 生成的轻量副本
+    """
+    profiler = timing.Profiler()
+    with timing.use_profiler(profiler), timing.date_scope(date_list[0]):
+        result_list = HorizonColumnGeneration(input_data=input_data, date_list=date_list,
+                                              seed_mode_list=seed_mode_list).run()
+    result_list[0].profiler = profiler
+    return result_list
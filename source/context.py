@@ -1,12 +1,17 @@
+import datetime
 import logging
 import time
+from typing import List
 from .input_data import InputData
 from .result_storage import ResultStorage
-from .utils.init_pattern import init_pattern
-from .model.original_problem import OriginalProblem
-from .model.master_problem import MasterProblem
-from .model.sub_problem import SubProblem
-from .utils.pattern_update import pattern_update
+from .column_generation import ColumnGeneration, HorizonColumnGeneration, ColumnGenerationResult, \
+    solve_date, solve_window
+from .utils.pattern_pool import PatternPool
+from .utils.checkpoint import Checkpoint, get_fingerprint
+from .utils.solution_cache import SolutionCache
+from .utils import filename
+from .utils import timing
+from .utils import header
 from . import do
 
 
@@ -14,113 +19,320 @@ class Context:
     def __init__(
             self,
             load_from_file: bool = True,
-            param_file_dict: dict = None
+            param_file_dict: dict = None,
+            resume: bool = False
     ):
+        """
+        :param resume: 是否从输出目录的检查点恢复，跳过已完成的日期
+        """
 
-        self.results = None
         self.input_data: InputData = InputData(
             load_from_file=load_from_file
             , param_file_dict=param_file_dict
         )
         self.result_storage: ResultStorage = None
-        self.master_problem: MasterProblem = MasterProblem(
-            demand_dict={},
-            pattern_dict={},
-        )
-        self.sub_problem: SubProblem = SubProblem(
-            input_data=self.input_data,
-            duals=[],
-            demand_dict={},
-        )
-        self.original_problem: OriginalProblem = OriginalProblem(
-            demand_dict={},
-            pattern_dict={},
-            min_pattern_used_num=0
-        )
+        self.pattern_pool: PatternPool = None
+        self.profiler: timing.Profiler = timing.Profiler()
+        self.resume = resume
+        self.checkpoint: Checkpoint = None
+        self.solution_cache: SolutionCache = None
 
-    def execute4specific_date(self, date: str):
+    def get_seed_mode_list(self, date: datetime.date):
+        if not self.input_data.reuse_pattern:
+            return []
+        return self.pattern_pool.seed(demand_dict=self.input_data.demand_dict[date])
+
+    def execute4specific_date(self, date: datetime.date):
+        key = self.get_cache_key(date_list=[date])
+        result_list = self.get_cached_result_list(key=key)
+        if result_list is None:
+            with timing.date_scope(date):
+                result = ColumnGeneration(
+                    input_data=self.input_data,
+                    date=date,
+                    seed_mode_list=self.get_seed_mode_list(date=date)
+                ).run()
+            result_list = [result]
+            self.add_to_cache(key=key, result_list=result_list)
+        self.record4specific_date(result=result_list[0])
+
+    def record4specific_date(self, result: ColumnGenerationResult):
+        """
+        按日期顺序记录求解结果：生成供需关系，并执行启用的后处理阶段
+        :param result: 该日期列生成 + 原问题的求解结果
+        """
         input_data = self.input_data
         result_storage = self.result_storage
-
-        demand_dict = input_data.demand_dict[date]
-        logging.info("start solving for date: {}".format(date))
+        date = result.date
         start = time.time()
-        pattern_dict = init_pattern(demand_dict=demand_dict, og_size=input_data.original_size)
-
-        improvable = True
-        iteration = 0
-        while improvable:
-            self.master_problem = MasterProblem(demand_dict=demand_dict, pattern_dict=pattern_dict)
-            self.master_problem.build_model()
-            master_obj, duals = self.master_problem.solve_model()
-
-            self.sub_problem = SubProblem(
-                input_data=input_data,
-                duals=duals,
-                demand_dict=demand_dict
-            )
-            self.sub_problem.build_model()
-            sub_obj, new_column, remain = self.sub_problem.solve_model()
-            logging.info("sub_obj: {}".format(sub_obj))
-
-            improvable = sub_obj > 1 + 1e-8
-
-            pattern_update(pattern_dict=pattern_dict, size_list=[d for d in demand_dict],
-                           new_column=new_column, original_size=input_data.original_size)
-            iteration += 1
-
-        self.original_problem = OriginalProblem(
-            demand_dict=demand_dict
-            , pattern_dict=pattern_dict
-            , min_pattern_used_num=input_data.min_pattern_used_num
-        )
-        self.original_problem.build_model()
-        og_obj, solution = self.original_problem.solve_model()
-
-        logging.info("Iterations: {}".format(iteration))
+        if result.profiler is not None:
+            self.profiler.merge(result.profiler)
 
         solution_do = do.Solution(date=date)
         solution_do.generate_pattern_used_dict(
-            demand_dict=demand_dict,
+            demand_dict=input_data.demand_dict[date],
             original_size=input_data.original_size,
-            solution=solution
+            solution=result.solution,
+            size_list=result.size_list
         )
 
+        solution_do.stage_time_dict.update(result.stage_time_dict)
+
         result_storage.solution_dict.update({date: solution_do})
-        result_storage.generate_fulfillment_relationship_by_date(date=date)
+        with timing.date_scope(date):
+            st = time.perf_counter()
+            result_storage.generate_fulfillment_relationship_by_date(date=date)
+            solution_do.stage_time_dict[header.OutKpiHeader.fulfillment_time] = time.perf_counter() - st
+
+            result_storage.post_process(date=date)
 
-        if input_data.whether_process_remain:
-            result_storage.post_process_remain(date=date)
+        result_storage.convergence_list.extend(result.convergence_list)
 
-        stamp4 = time.time()
-        total_run_time = stamp4 - start
+        if input_data.reuse_pattern:
+            self.pattern_pool.add(mode_list=result.mode_list)
+
+        total_run_time = result.running_time + time.time() - start
         result_storage.solution_dict[date].running_time = total_run_time
         logging.info("Running time for date {}: {}".format(date, total_run_time))
-        return date, result_storage
+        result_storage.stream_date(date=date)
+        self.save_checkpoint(result=result)
 
     def run(
             self
     ):
+        with timing.use_profiler(self.profiler):
+            self.input_data.read_data()
+
+            self.result_storage = ResultStorage(input_data=self.input_data)
+            self.pattern_pool = PatternPool(input_data=self.input_data)
+            if self.input_data.reuse_pattern and self.input_data.pattern_pool_file:
+                self.pattern_pool.load(path=self.input_data.pattern_pool_file)
+            self.restore_checkpoint()
+            self.load_solution_cache()
+
+            try:
+                if self.input_data.horizon_mode:
+                    self.execute_by_horizon()
+                elif self.input_data.n_jobs == 1:
+                    self.execute_sequentially()
+                else:
+                    self.execute_in_parallel()
 
-        self.input_data.read_data()
+                if self.input_data.reuse_pattern and self.input_data.pattern_pool_file:
+                    self.pattern_pool.dump(path=self.input_data.pattern_pool_file)
+                if self.solution_cache is not None:
+                    self.solution_cache.dump()
 
-        self.result_storage = ResultStorage(input_data=self.input_data)
+                output_dict = self.result_storage.dump()
+            finally:
+                # 异常退出时也关闭按日期写出的输出表，已完成日期的结果可以读取
+                self.result_storage.close_writers()
+
+        if self.input_data.load_from_file:
+            self.profiler.dump(output_folder=self.input_data.output_folder)
+        return output_dict
+
+    # region checkpoint
+    def restore_checkpoint(self):
+        """
+        读取文件时才保存检查点；resume 时按日期顺序回放检查点中的记录，恢复已完成日期的结果、供需状态和方案池，
+        重建供需匹配队列，并重新写出已完成日期的按日期输出
+        """
+        if not self.input_data.load_from_file or not (self.input_data.save_checkpoint or self.resume):
+            return
+        self.checkpoint = Checkpoint(
+            path='{}{}'.format(self.input_data.output_folder, filename.CHECKPOINT_FILE),
+            fingerprint=get_fingerprint([self.input_data.df_global_param, self.input_data.df_demand])
+        )
+        record_list = self.checkpoint.load() if self.resume else None
+        # 重新写出检查点，之后的日期在其后追加
+        self.checkpoint.start(record_list=record_list)
+        if record_list is None:
+            return
+
+        result_storage = self.result_storage
+        demand_dict = self.input_data.demand_dict
+        for record in record_list:
+            for demand in record['demand_list']:
+                demand_dict[demand.date][demand.size] = demand
+            for supply in record['supply_list']:
+                result_storage.supply_dict[(supply.date, supply.pattern_id, supply.size)] = supply
+            result_storage.solution_dict[record['date']] = record['solution']
+            result_storage.convergence_list.extend(record['convergence_list'])
+            if self.input_data.reuse_pattern:
+                self.pattern_pool.add(mode_list=record['mode_list'])
+        result_storage.generate_open_queue()
+        result_storage.pop_changed()
+        for date in result_storage.solution_dict:
+            result_storage.stream_date(date=date)
+        logging.info("Resumed {} completed dates from checkpoint.".format(len(result_storage.solution_dict)))
 
-        self.execute_sequentially()
+    def save_checkpoint(self, result: ColumnGenerationResult):
+        """
+        追加该日期的记录：结果、新增或变化的供应与需求、收敛记录及加入方案池的方案
+        """
+        supply_list, demand_list = self.result_storage.pop_changed()
+        if self.checkpoint is None:
+            return
+        self.checkpoint.append(record={
+            'date': result.date,
+            'solution': self.result_storage.solution_dict[result.date],
+            'supply_list': supply_list,
+            'demand_list': demand_list,
+            'convergence_list': result.convergence_list,
+            'mode_list': result.mode_list if self.input_data.reuse_pattern else []
+        })
 
-        return self.result_storage.dump()
+    def get_pending_date_list(self) -> List[datetime.date]:
+        """
+        :return: 尚未完成的日期，按日期先后排列
+        """
+        return [date for date in self.input_data.demand_dict if date not in self.result_storage.solution_dict]
+
+    # endregion
+
+    # region solution cache
+    def load_solution_cache(self):
+        """
+        增量求解时读取上次运行保存的解缓存
+        """
+        if not self.input_data.load_from_file or not self.input_data.incremental_solve:
+            return
+        ph = header.ParamHeader
+        df_global_param = self.input_data.df_global_param
+        self.solution_cache = SolutionCache(
+            path='{}{}'.format(self.input_data.output_folder, filename.SOLUTION_CACHE_FILE),
+            param_dict=dict(zip(df_global_param[ph.parameter_name], df_global_param[ph.parameter_value]))
+        )
+        self.solution_cache.load()
+
+    def get_cache_key(self, date_list: List[datetime.date]) -> str:
+        """
+        :return: 这些日期当前剩余需求的指纹，未启用增量求解时返回 None
+        """
+        if self.solution_cache is None:
+            return None
+        return self.solution_cache.get_key(
+            date_demand_dict={date: self.input_data.demand_dict[date] for date in date_list})
+
+    def get_cached_result_list(self, key: str) -> List[ColumnGenerationResult]:
+        if key is None:
+            return None
+        entry_list = self.solution_cache.get(key=key)
+        if entry_list is None:
+            return None
+        logging.info("Reuse cached solution for dates: {}".format([entry['date'] for entry in entry_list]))
+        return [
+            ColumnGenerationResult(
+                date=entry['date'],
+                solution=entry['solution'],
+                running_time=0.0,
+                mode_list=entry['mode_list'],
+                size_list=entry['size_list']
+            )
+            for entry in entry_list
+        ]
+
+    def add_to_cache(self, key: str, result_list: List[ColumnGenerationResult]):
+        if key is None:
+            return
+        self.solution_cache.add(key=key, entry_list=[
+            {
+                'date': result.date,
+                'solution': result.solution,
+                'size_list': result.size_list,
+                'mode_list': result.mode_list
+            }
+            for result in result_list
+        ])
+
+    # endregion
 
     def execute_in_parallel(self):
+        """
+        各日期的列生成与原问题在进程池中独立求解，子进程只接收该日期的轻量副本；
+        供需匹配与补库后处理随后在主进程中按日期顺序依次执行
+        """
         from joblib import Parallel, delayed
-        dates = [date for date in self.input_data.demand_dict]
+        dates = self.get_pending_date_list()
+
+        if self.input_data.whether_process_remain:
+            logging.warning("Dates are solved in parallel on their own demand, "
+                            "remain is only reused in post process afterwards.")
 
-        self.results = Parallel(n_jobs=4)(delayed(self.execute4specific_date)(date) for date in dates)
+        key_dict = {date: self.get_cache_key(date_list=[date]) for date in dates}
+        result_dict = {date: self.get_cached_result_list(key=key_dict[date]) for date in dates}
+        solve_dates = [date for date in dates if result_dict[date] is None]
 
-        for (date, result_storage) in self.results:
-            self.result_storage.input_data.demand_dict[date].update(result_storage.input_data.demand_dict[date])
-            self.result_storage.supply_dict.update(result_storage.supply_dict)
-            self.result_storage.solution_dict.update(result_storage.solution_dict)
+        results = Parallel(n_jobs=self.input_data.n_jobs)(
+            delayed(solve_date)(
+                input_data=self.input_data.payload_for_date(date),
+                date=date,
+                seed_mode_list=self.get_seed_mode_list(date=date)
+            )
+            for date in solve_dates
+        )
+        for date, result in zip(solve_dates, results):
+            result_dict[date] = [result]
+            self.add_to_cache(key=key_dict[date], result_list=[result])
+
+        for date in dates:
+            self.record4specific_date(result=result_dict[date][0])
 
     def execute_sequentially(self):
-        for date in self.input_data.demand_dict:
+        for date in self.get_pending_date_list():
             self.execute4specific_date(date=date)
+
+    def get_window_list(self) -> List[List[datetime.date]]:
+        """
+        按日期先后把尚未完成的日期切分为长度为 联合求解窗口日期数 的窗口
+        """
+        date_list = self.get_pending_date_list()
+        window = self.input_data.horizon_window
+        return [date_list[k:k + window] for k in range(0, len(date_list), window)]
+
+    def execute_by_horizon(self):
+        """
+        多日联合求解：每个窗口的日期共用一个列生成模型，窗口内可以提前生产；
+        顺序求解时之后的窗口只求解剩余需求，并行求解时各窗口独立求解
+        """
+        window_list = self.get_window_list()
+        if self.input_data.n_jobs == 1:
+            for date_list in window_list:
+                key = self.get_cache_key(date_list=date_list)
+                result_list = self.get_cached_result_list(key=key)
+                if result_list is None:
+                    with timing.date_scope(date_list[0]):
+                        result_list = HorizonColumnGeneration(
+                            input_data=self.input_data,
+                            date_list=date_list,
+                            seed_mode_list=self.get_window_seed_mode_list(date_list=date_list)
+                        ).run()
+                    self.add_to_cache(key=key, result_list=result_list)
+                for result in result_list:
+                    self.record4specific_date(result=result)
+            return
+
+        from joblib import Parallel, delayed
+        key_list = [self.get_cache_key(date_list=date_list) for date_list in window_list]
+        result_list_by_window = [self.get_cached_result_list(key=key) for key in key_list]
+        solve_index_list = [k for k, result_list in enumerate(result_list_by_window) if result_list is None]
+
+        solved_list = Parallel(n_jobs=self.input_data.n_jobs)(
+            delayed(solve_window)(
+                input_data=self.input_data.payload_for_dates(window_list[k]),
+                date_list=window_list[k],
+                seed_mode_list=self.get_window_seed_mode_list(date_list=window_list[k])
+            )
+            for k in solve_index_list
+        )
+        for k, result_list in zip(solve_index_list, solved_list):
+            result_list_by_window[k] = result_list
+            self.add_to_cache(key=key_list[k], result_list=result_list)
+
+        for result_list in result_list_by_window:
+            for result in result_list:
+                self.record4specific_date(result=result)
+
+    def get_window_seed_mode_list(self, date_list: List[datetime.date]):
+        return [mode for date in date_list for mode in self.get_seed_mode_list(date=date)]
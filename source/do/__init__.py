@@ -1,5 +1,6 @@
 from .demand import Demand
 from .pattern import Pattern
+from .pattern_matrix import PatternMatrix
 from .solution import Solution
 from .size import Size
 from .supply import Supply
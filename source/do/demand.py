@@ -1,16 +1,21 @@
+import datetime
 from typing import Dict, Tuple
 
 
 class Demand:
-    def __init__(self, date: str, size: float, amount: int):
+    __slots__ = ('date', 'size', 'original_amount', 'supply_amount_dict', 'supplied_amount')
+
+    def __init__(self, date: datetime.date, size: float, amount: int):
         self.date = date
         self.size = size
         self.original_amount = amount
-        self.supply_amount_dict: Dict[Tuple[str, str], int] = dict()
+        self.supply_amount_dict: Dict[Tuple[datetime.date, int], int] = dict()
+        # supply_amount_dict 的累计值，只通过 Supply.fill 更新
+        self.supplied_amount = 0
 
     def __repr__(self):
         return 'Demand(size={}, amount={})'.format(self.size, self.amount)
 
     @property
     def amount(self):
-        return self.original_amount - sum(self.supply_amount_dict.values())
\ No newline at end of file
+        return self.original_amount - self.supplied_amount
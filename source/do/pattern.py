@@ -14,6 +14,13 @@ class Pattern:
     def __repr__(self):
         return 'Pattern(id={})'.format(self.pattern_id)
 
+    @property
+    def key(self):
+        """
+        方案的规范表示：按幅宽排序的 (幅宽, 段数)，忽略段数为 0 的幅宽，用于判断方案是否重复
+        """
+        return tuple(sorted((size, int(round(qty))) for size, qty in self.mode.items() if round(qty) > 0))
+
     @property
     def useful_size(self):
         return sum(k * v for k, v in self.mode.items())
@@ -0,0 +1,54 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from .pattern import Pattern
+
+
+class PatternMatrix:
+    """
+    切割方案矩阵：行为幅宽，列为方案，元素为该方案中该幅宽的段数。
+    列按加入顺序存放，容量不足时按倍数扩容，便于列生成中逐列追加。
+    """
+
+    def __init__(self, size_list: List[float], capacity: int = 64):
+        self.size_list = list(size_list)
+        self.size_index: Dict[float, int] = {size: i for i, size in enumerate(self.size_list)}
+        self.pattern_id_list: List[int] = list()
+        self.pattern_index: Dict[int, int] = dict()
+        self.matrix = np.zeros((len(self.size_list), max(capacity, 1)), dtype=np.int16)
+
+    @classmethod
+    def from_pattern_dict(cls, size_list: List[float], pattern_dict: Dict[int, Pattern]):
+        pattern_matrix = cls(size_list=size_list, capacity=len(pattern_dict))
+        for pattern in pattern_dict.values():
+            pattern_matrix.add_pattern(pattern)
+        return pattern_matrix
+
+    def __len__(self):
+        return len(self.pattern_id_list)
+
+    @property
+    def data(self) -> np.ndarray:
+        return self.matrix[:, :len(self)]
+
+    def add_pattern(self, pattern: Pattern):
+        col = len(self)
+        if col == self.matrix.shape[1]:
+            self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)], axis=1)
+        for size, qty in pattern.mode.items():
+            if size in self.size_index:
+                self.matrix[self.size_index[size], col] = int(round(qty))
+        self.pattern_id_list.append(pattern.pattern_id)
+        self.pattern_index[pattern.pattern_id] = col
+
+    def column(self, pattern_id: int) -> np.ndarray:
+        return self.matrix[:, self.pattern_index[pattern_id]]
+
+    def column_nonzero(self, pattern_id: int) -> Tuple[List[float], List[int]]:
+        column = self.column(pattern_id)
+        rows = np.flatnonzero(column)
+        return [self.size_list[i] for i in rows], column[rows].tolist()
+
+    def row_nonzero(self, size: float) -> Tuple[List[int], List[int]]:
+        row = self.data[self.size_index[size]]
+        cols = np.flatnonzero(row)
+        return [self.pattern_id_list[j] for j in cols], row[cols].tolist()
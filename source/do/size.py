@@ -1,15 +1,25 @@
+import datetime
 from typing import Dict
 from .demand import Demand
+from .supply import Supply
 
 
 class Size:
+    __slots__ = ('size', 'demand_dict', 'demand_amount')
+
     def __init__(self, size: float):
         self.size = size
-        self.demand_dict: Dict[str, Demand] = dict()
+        self.demand_dict: Dict[datetime.date, Demand] = dict()
+        # demand_dict 中各需求剩余数量之和，只通过 add_demand 和 fill 更新
+        self.demand_amount = 0
 
     def __repr__(self):
         return "Size({})".format(self.size)
 
-    @property
-    def demand_amount(self):
-        return sum(demand.amount for demand in self.demand_dict.values())
+    def add_demand(self, demand: Demand):
+        self.demand_dict[demand.date] = demand
+        self.demand_amount += demand.amount
+
+    def fill(self, supply: Supply, demand: Demand, amount: float):
+        supply.fill(demand=demand, amount=amount)
+        self.demand_amount -= amount
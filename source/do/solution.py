@@ -1,15 +1,19 @@
+import datetime
 from typing import List, Dict
 import logging
-from itertools import chain
+import numpy as np
 from .. import do
+from ..utils import sequencing
 
 
 class Solution:
-    def __init__(self, date: str):
+    def __init__(self, date: datetime.date):
         self.date = date
         self.pattern_used_dict = dict()
         self.running_time: float = 0
         self.knife_change_times: float = 0
+        # 各阶段耗时（秒），键为阶段名
+        self.stage_time_dict: Dict[str, float] = dict()
 
     @property
     def used_original_roll_num(self):
@@ -18,11 +22,19 @@ class Solution:
 
     def generate_pattern_used_dict(self, demand_dict: Dict[float, do.Demand],
                                    original_size: float,
-                                   solution: list):
+                                   solution: list,
+                                   size_list: List[float] = None):
+        """
+        :param size_list: solution 中段数对应的幅宽顺序，为 None 时取 demand_dict 的顺序
+        """
         pattern_used_dict = dict()
+        if size_list is None:
+            size_list = [size for size in demand_dict]
         idx = 0
         for (pattern, used_num) in solution:
-            mode = dict(zip(demand_dict.keys(), pattern))
+            column = np.rint(np.asarray(pattern, dtype=float)).astype(np.int16)
+            rows = np.flatnonzero(column)
+            mode = {size_list[i]: int(column[i]) for i in rows}
             new_pattern = do.Pattern(
                 pattern_id=idx,
                 original_size=original_size,
@@ -34,70 +46,52 @@ class Solution:
         self.pattern_used_dict = pattern_used_dict
         logging.info("generated solution for date: {}".format(self.date))
 
-    @staticmethod
-    def get_cut_point(original: list, counts: list):
-        repeated = [[num] * int(count) for num, count in zip(original, counts)]
-        result = list(chain(*repeated))
-        return result
+    def get_pattern_matrix(self) -> do.PatternMatrix:
+        size_list = sorted({size for pattern in self.pattern_used_dict.values() for size in pattern.mode})
+        return do.PatternMatrix.from_pattern_dict(size_list=size_list, pattern_dict=self.pattern_used_dict)
 
-    def get_pattern_change_matrix(self):
-        cut_point = [
-            self.get_cut_point(original=pattern.mode.keys(), counts=pattern.mode.values())
-            for pattern_id, pattern in self.pattern_used_dict.items()
-        ]
-        # initial knife change from None pattern
-        exchange_sets = []
-        knife_change_times = []
-        for i in range(len(cut_point)):
-            for j in range(i + 1, len(cut_point)):
-                uni_cuts = set(cut_point[i]) & set(cut_point[j])
-                number_change = len(cut_point[i]) + len(cut_point[j]) - 2 * len(uni_cuts)
-                exchange_sets.append({i, j})
-                knife_change_times.append(number_change)
-        return exchange_sets, knife_change_times
+    def get_pattern_change_matrix(self) -> np.ndarray:
+        """
+        两个方案之间的换刀次数 = 两者的段数之和 - 2 * 共同幅宽的种类数
+        :return: n×n 换刀次数矩阵，行列顺序与 pattern_used_dict 一致
+        """
+        matrix = self.get_pattern_matrix().data
+        piece_num = matrix.sum(axis=0).astype(int)
+        presence = (matrix > 0).astype(int)
+        common_size_num = presence.T @ presence
+        change_matrix = piece_num[:, None] + piece_num[None, :] - 2 * common_size_num
+        np.fill_diagonal(change_matrix, 0)
+        return change_matrix
 
-    def get_min_knife_change(self):
-        exchange_sets, knife_change_times = self.get_pattern_change_matrix()
-
-        min_change_by_pattern_id = dict()
-        pattern_change_path_by_pattern_id = dict()
-        for i in self.pattern_used_dict:
-            # i 表示从 当前第 i 个pattern作为init pattern
-            remain_patterns = [k for k in self.pattern_used_dict if k != i]
-            current_pattern = i
-            pattern_change_path = [i]
-            current_knife_change = 0
-            while remain_patterns:
-                available_change = [{current_pattern, pattern} for pattern in remain_patterns]
-                exchange_dict = {
-                    tuple(pattern_set): times
-                    for pattern_set, times in zip(exchange_sets, knife_change_times)
-                    if pattern_set in available_change
-                }
-                min_value = min(exchange_dict.values())
-                current_knife_change += min_value
-                min_exchange_list = [key for key, value in exchange_dict.items() if value == min_value]
-                next_current_pattern_list = [value for pair in min_exchange_list for value in pair if
-                                             value != current_pattern]
-                current_pattern = next_current_pattern_list[0]
-                pattern_change_path.append(current_pattern)
-                remain_patterns.remove(current_pattern)
-            min_change_by_pattern_id[i] = current_knife_change
-            pattern_change_path_by_pattern_id[i] = pattern_change_path
-
-        min_key = min(min_change_by_pattern_id, key=min_change_by_pattern_id.get)
-        min_change = min_change_by_pattern_id[min_key]
-        corresponding_path = pattern_change_path_by_pattern_id[min_key]
+    def get_min_knife_change(self, time_limit: float = 1.0, exact_limit: int = 0):
+        """
+        求总换刀次数最少的方案顺序
+        :param time_limit: 改进阶段的时间上限（秒）
+        :param exact_limit: 方案数不超过该值时用状态压缩动态规划求精确顺序
+        :return: 最少换刀次数，按顺序排列的 pattern_id 列表
+        """
+        pattern_id_list = list(self.pattern_used_dict)
+        min_change, path = sequencing.get_min_cost_path(
+            cost_matrix=self.get_pattern_change_matrix(),
+            time_limit=time_limit,
+            exact_limit=exact_limit
+        )
+        corresponding_path = [pattern_id_list[k] for k in path]
         logging.info("min change is {}".format(min_change))
         return min_change, corresponding_path
 
-    def resort_pattern(self, update_key: List[int]):
-        update_pattern_used_dict = {k: self.pattern_used_dict[k] for k in update_key}
-        update_pattern_used_dict = dict(
-            zip(
-                range(len(update_pattern_used_dict)),
-                update_pattern_used_dict.values()
-            )
-        )
+    def resort_pattern(self, update_key: List[int]) -> Dict[int, int]:
+        """
+        按 update_key 的顺序重新编号方案
+        :param update_key: 按顺序排列的 pattern_id 列表
+        :return: {原 pattern_id：新 pattern_id}
+        """
+        id_map = {pattern_id: idx for idx, pattern_id in enumerate(update_key)}
+        update_pattern_used_dict = dict()
+        for pattern_id in update_key:
+            pattern = self.pattern_used_dict[pattern_id]
+            pattern.pattern_id = id_map[pattern_id]
+            update_pattern_used_dict[pattern.pattern_id] = pattern
         self.pattern_used_dict = update_pattern_used_dict
         logging.info("resorted pattern with corresponding_path.")
+        return id_map
@@ -1,13 +1,19 @@
+import datetime
 from typing import Dict
+from .demand import Demand
 
 
 class Supply:
-    def __init__(self, date: str, pattern_id: int, size: float, supply_amount: float):
+    __slots__ = ('date', 'pattern_id', 'size', 'supply_amount', 'demand_amount_dict', 'allocated_amount')
+
+    def __init__(self, date: datetime.date, pattern_id: int, size: float, supply_amount: float):
         self.date = date
         self.pattern_id = pattern_id
         self.size = size
         self.supply_amount = supply_amount
-        self.demand_amount_dict: Dict[str, float] = dict()
+        self.demand_amount_dict: Dict[datetime.date, float] = dict()
+        # demand_amount_dict 的累计值，只通过 fill 更新
+        self.allocated_amount = 0
 
     def __repr__(self):
         return 'Supply(date={}, pattern_id={}, size={}, supply_amount={}, left_amount={})'.format(
@@ -15,4 +21,16 @@ class Supply:
 
     @property
     def amount(self):
-        return self.supply_amount - sum(self.demand_amount_dict.values())
+        return self.supply_amount - self.allocated_amount
+
+    def fill(self, demand: Demand, amount: float):
+        """
+        用该供应满足需求，同时更新供需两侧的记录和累计值
+        :param demand: 需求
+        :param amount: 满足数量
+        """
+        self.demand_amount_dict[demand.date] = self.demand_amount_dict.get(demand.date, 0) + amount
+        self.allocated_amount += amount
+        key = (self.date, self.pattern_id)
+        demand.supply_amount_dict[key] = demand.supply_amount_dict.get(key, 0) + amount
+        demand.supplied_amount += amount
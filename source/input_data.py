@@ -1,7 +1,9 @@
 import os
+import copy
+import datetime
 import pandas as pd
 import logging
-from typing import Dict
+from typing import Dict, List
 from . import do
 from .utils import filename
 from .utils import header
@@ -31,7 +33,32 @@ class InputData:
         self.waste_up_limit = None
         self.waste_low_limit = 0.0
         self.whether_process_remain = None
-        self.demand_dict: Dict[str: do.Demand] = dict()
+        self.persistent_master = False
+        self.sub_problem_method = field.SubProblemMethod.mip
+        self.column_num_per_iteration = 1
+        self.n_jobs = 1
+        self.reuse_pattern = False
+        self.pattern_pool_file = None
+        self.rounding_gap_tolerance = None
+        self.solver_name = 'glpk'
+        self.knife_change_time_limit = 1.0
+        self.knife_change_exact_limit = 15
+        self.sort_knife_change = False
+        self.cg_max_iteration = None
+        self.cg_time_limit = None
+        self.cg_bound_stop = False
+        self.dual_stabilization = field.DualStabilization.none
+        self.dual_smoothing_alpha = 0.5
+        self.dual_box_radius = 0.1
+        self.init_pattern_method = field.InitPatternMethod.single
+        self.pattern_age_limit = None
+        self.horizon_mode = False
+        self.horizon_window = 3
+        self.holding_cost = 0.001
+        self.output_format = field.OutputFormat.csv
+        self.save_checkpoint = False
+        self.incremental_solve = False
+        self.demand_dict: Dict[datetime.date, Dict[float, do.Demand]] = dict()
 
     # region read data
     def read_data(self):
@@ -61,6 +88,45 @@ class InputData:
         self.whether_process_remain = field.BoolCN.true in global_param_dict.get(pn.whether_process_remain,
                                                                                  field.BoolCN.false)
         self.consider_waste = field.BoolCN.true in global_param_dict.get(pn.consider_waste, field.BoolCN.false)
+        self.persistent_master = field.BoolCN.true in global_param_dict.get(pn.persistent_master,
+                                                                            field.BoolCN.false)
+        self.sub_problem_method = str(global_param_dict.get(pn.sub_problem_method,
+                                                            field.SubProblemMethod.mip)).strip()
+        self.column_num_per_iteration = max(1, int(global_param_dict.get(pn.column_num_per_iteration, 1)))
+        self.n_jobs = int(global_param_dict.get(pn.n_jobs, 1))
+        self.reuse_pattern = field.BoolCN.true in global_param_dict.get(pn.reuse_pattern, field.BoolCN.false)
+        pattern_pool_file = global_param_dict.get(pn.pattern_pool_file, None)
+        if isinstance(pattern_pool_file, str) and pattern_pool_file.strip():
+            self.pattern_pool_file = pattern_pool_file.strip()
+        rounding_gap_tolerance = global_param_dict.get(pn.rounding_gap_tolerance, None)
+        if rounding_gap_tolerance is not None and not pd.isna(rounding_gap_tolerance):
+            self.rounding_gap_tolerance = float(rounding_gap_tolerance)
+        self.solver_name = str(global_param_dict.get(pn.solver_name, 'glpk')).strip()
+        self.knife_change_time_limit = float(global_param_dict.get(pn.knife_change_time_limit, 1.0))
+        self.knife_change_exact_limit = int(global_param_dict.get(pn.knife_change_exact_limit, 15))
+        self.sort_knife_change = field.BoolCN.true in global_param_dict.get(pn.sort_knife_change, field.BoolCN.false)
+        cg_max_iteration = global_param_dict.get(pn.cg_max_iteration, None)
+        if cg_max_iteration is not None and not pd.isna(cg_max_iteration):
+            self.cg_max_iteration = int(cg_max_iteration)
+        cg_time_limit = global_param_dict.get(pn.cg_time_limit, None)
+        if cg_time_limit is not None and not pd.isna(cg_time_limit):
+            self.cg_time_limit = float(cg_time_limit)
+        self.cg_bound_stop = field.BoolCN.true in global_param_dict.get(pn.cg_bound_stop, field.BoolCN.false)
+        self.dual_stabilization = str(global_param_dict.get(pn.dual_stabilization,
+                                                            field.DualStabilization.none)).strip()
+        self.dual_smoothing_alpha = float(global_param_dict.get(pn.dual_smoothing_alpha, 0.5))
+        self.dual_box_radius = float(global_param_dict.get(pn.dual_box_radius, 0.1))
+        self.init_pattern_method = str(global_param_dict.get(pn.init_pattern_method,
+                                                             field.InitPatternMethod.single)).strip()
+        pattern_age_limit = global_param_dict.get(pn.pattern_age_limit, None)
+        if pattern_age_limit is not None and not pd.isna(pattern_age_limit) and int(pattern_age_limit) > 0:
+            self.pattern_age_limit = int(pattern_age_limit)
+        self.horizon_mode = field.BoolCN.true in global_param_dict.get(pn.horizon_mode, field.BoolCN.false)
+        self.horizon_window = max(1, int(global_param_dict.get(pn.horizon_window, 3)))
+        self.holding_cost = float(global_param_dict.get(pn.holding_cost, 0.001))
+        self.output_format = str(global_param_dict.get(pn.output_format, field.OutputFormat.csv)).strip().lower()
+        self.save_checkpoint = field.BoolCN.true in global_param_dict.get(pn.save_checkpoint, field.BoolCN.false)
+        self.incremental_solve = field.BoolCN.true in global_param_dict.get(pn.incremental_solve, field.BoolCN.false)
         if self.consider_waste:
             self.remain_low_limit = float(global_param_dict[pn.remain_low_limit])
             self.waste_up_limit = float(global_param_dict[pn.waste_up_limit])
@@ -82,30 +148,55 @@ class InputData:
                 )
             )
         demand_df = self.df_demand
-        demand_df = demand_df[(demand_df[dh.size] > 0) & (demand_df[dh.amount] > 0)]
-        # rename columns
-        demand_df.rename(columns={dh.size: dh.size, dh.amount: dh.amount, dh.date: dh.date}, inplace=True)
+        demand_df = demand_df.loc[
+            (demand_df[dh.size] > 0) & (demand_df[dh.amount] > 0), [dh.date, dh.size, dh.amount]
+        ].copy()
+        # 日期只在这里解析一次
+        demand_df[dh.date] = pd.to_datetime(demand_df[dh.date]).dt.date
 
+        # 同一日期同一幅宽的需求合并，幅宽保持在文件中首次出现的顺序
+        amount_series = demand_df.groupby([dh.date, dh.size], sort=False)[dh.amount].sum()
         demand_dict = dict()
-        for date, df_by_date in demand_df.groupby(dh.date):
-            demand_dict_by_date = {}
-            for index, row in df_by_date.iterrows():
-                demand_dict_by_date[row[dh.size]] = demand_dict_by_date.get(row[dh.size], 0) + row[dh.amount]
+        for (date, size), amount in amount_series.items():
+            demand_dict.setdefault(date, dict())[size] = do.Demand(
+                date=date,
+                size=size,
+                amount=amount
+            )
+        self.demand_dict = dict(sorted(demand_dict.items()))
+        logging.info("loaded demand dict: {}".format(len(self.demand_dict)))
+
+    # endregion
+
+    # region utils
+    def payload_for_date(self, date: datetime.date):
+        """
+        生成只包含单个日期剩余需求、不含原始 DataFrame 的轻量副本，供子进程求解
+        :param date: 日期
+        :return: InputData 副本
+        """
+        return self.payload_for_dates(date_list=[date])
 
-            update_demand_dict = {
+    def payload_for_dates(self, date_list: List[datetime.date]):
+        """
+        生成只包含指定日期剩余需求、不含原始 DataFrame 的轻量副本，供子进程求解
+        :param date_list: 日期列表
+        :return: InputData 副本
+        """
+        payload = copy.copy(self)
+        payload.df_global_param = None
+        payload.df_demand = None
+        payload.demand_dict = {
+            date: {
                 size: do.Demand(
                     date=date,
                     size=size,
-                    amount=amount
+                    amount=demand.amount
                 )
-                for size, amount in demand_dict_by_date.items()
+                for size, demand in self.demand_dict[date].items()
             }
-            demand_dict[date] = update_demand_dict
-        self.demand_dict = demand_dict
-        logging.info("loaded demand dict: {}".format(len(self.demand_dict)))
-
-    # endregion
-
-    # region utils
+            for date in date_list
+        }
+        return payload
 
     # endregion
@@ -0,0 +1,132 @@
+import datetime
+import pyomo.environ as pe
+from typing import Dict, List
+from .. import do
+from ..utils.timing import record_time_decorator
+from .master_problem import MasterProblem
+from .solver import DEFAULT_SOLVER_NAME
+
+
+class HorizonMasterProblem(MasterProblem):
+    """
+    多日联合主问题：窗口内各日期共享方案池。
+    x[j, s] 为日期 s 使用方案 j 的次数，f[i, s, t] 为日期 s 生产、用于满足日期 t（t 不早于 s）需求的幅宽 i 的数量；
+    每个 (幅宽, 生产日期) 的产出不少于流出，每个 (幅宽, 需求日期) 的流入等于需求，
+    目标为总卷数加上提前生产的持有成本
+    """
+
+    def __init__(self, date_demand_dict: Dict[datetime.date, Dict[float, do.Demand]],
+                 demand_dict: Dict[float, do.Demand],
+                 pattern_dict: Dict[int, do.Pattern],
+                 holding_cost: float = 0.0,
+                 solver_name: str = DEFAULT_SOLVER_NAME):
+        """
+        :param date_demand_dict: {日期：{幅宽：需求}}，日期按先后排列
+        :param demand_dict: 窗口内各幅宽的总需求，决定幅宽顺序
+        :param holding_cost: 每件提前一个日期生产的持有成本（卷）
+        """
+        super(HorizonMasterProblem, self).__init__(
+            demand_dict=demand_dict,
+            pattern_dict=pattern_dict,
+            solver_name=solver_name
+        )
+        self.date_demand_dict = date_demand_dict
+        self.date_list: List[datetime.date] = list(date_demand_dict)
+        self.holding_cost = holding_cost
+        self.model = pe.ConcreteModel('HorizonMaster')
+        self.model.dual = pe.Suffix(direction=pe.Suffix.IMPORT)
+
+    def create_sets(self):
+        super(HorizonMasterProblem, self).create_sets()
+        self.model.set_s = pe.Set(initialize=self.date_list, ordered=True)
+        self.model.set_d = pe.Set(
+            initialize=[(i, t) for t in self.date_list for i, demand in self.date_demand_dict[t].items()
+                        if i in self.demand_dict and demand.amount > 1e-4],
+            dimen=2, ordered=True
+        )
+        self.model.set_f = pe.Set(
+            initialize=[(i, s, t) for (i, t) in self.model.set_d
+                        for s in self.date_list[:self.date_list.index(t) + 1]],
+            dimen=3, ordered=True
+        )
+
+    def create_vars(self):
+        self.model.x = pe.Var(self.model.set_j, self.model.set_s, name='x', within=pe.NonNegativeReals)
+        self.model.f = pe.Var(self.model.set_f, name='f', within=pe.NonNegativeReals)
+
+    def create_ctrs(self):
+        flow_dict = {(i, s): [] for i in self.model.set_i for s in self.model.set_s}
+        for (i, s, t) in self.model.set_f:
+            flow_dict[(i, s)].append(t)
+
+        # supply balance: 日期 s 生产的幅宽 i 不少于流出
+        def supply_balance(model, i, s):
+            pattern_id_list, qty_list = self.pattern_matrix.row_nonzero(i)
+            if not pattern_id_list and not flow_dict[(i, s)]:
+                return pe.Constraint.Skip
+            return sum(qty * model.x[j, s] for j, qty in zip(pattern_id_list, qty_list)) - \
+                sum(model.f[i, s, t] for t in flow_dict[(i, s)]) >= 0
+
+        self.model.supply_balance = pe.Constraint(self.model.set_i, self.model.set_s, rule=supply_balance)
+
+        # demand satisfying constraints
+        def demand_satisfaction(model, i, t):
+            return sum(model.f[i, s, t] for s in self.date_list[:self.date_list.index(t) + 1]) == \
+                self.date_demand_dict[t][i].amount
+
+        self.model.demand_satisfaction = pe.Constraint(self.model.set_d, rule=demand_satisfaction)
+
+    def create_obj(self):
+        date_index = {s: k for k, s in enumerate(self.date_list)}
+        self.model.obj = pe.Objective(
+            expr=sum(self.model.x[j, s] for j in self.model.set_j for s in self.model.set_s) +
+            self.holding_cost * sum((date_index[t] - date_index[s]) * self.model.f[i, s, t]
+                                    for (i, s, t) in self.model.set_f),
+            sense=pe.minimize
+        )
+
+    def add_pattern(self, pattern: do.Pattern):
+        """
+        在已建好的模型上追加一列：为每个日期新增 x[j, s]，并只更新该列涉及的产出约束与目标函数
+        :param pattern: 新生成的切割方案，需已加入 pattern_dict
+        """
+        j = pattern.pattern_id
+        self.pattern_matrix.add_pattern(pattern)
+        self.model.set_j.add(j)
+        size_list, qty_list = self.pattern_matrix.column_nonzero(j)
+        x_dict = {s: self.model.x[j, s] for s in self.model.set_s}
+        self.model.obj.expr = self.model.obj.expr + sum(x_dict.values())
+        for s, x_js in x_dict.items():
+            ctr_list = []
+            for size, qty in zip(size_list, qty_list):
+                # 被跳过的产出约束没有流出，新增产出不影响可行性
+                if (size, s) not in self.model.supply_balance:
+                    continue
+                ctr = self.model.supply_balance[size, s]
+                ctr.set_value((ctr.lower, ctr.body + qty * x_js, ctr.upper))
+                ctr_list.append(ctr)
+            self.opt.update_column(var=x_js, constraint_list=ctr_list, objective=self.model.obj)
+
+    @record_time_decorator(task_name="主问题求解时长")
+    def solve_model(self):
+        self.opt.solve(self.model, load_duals=True)
+        duals = self.get_duals()
+        obj = pe.value(self.model.obj)
+        return obj, duals
+
+    def get_duals(self) -> Dict[datetime.date, List[float]]:
+        """
+        :return: {日期：各幅宽产出约束的对偶值}，即该日期定价使用的对偶值
+        """
+        duals = dict()
+        for s in self.model.set_s:
+            duals[s] = [
+                self.model.dual.get(self.model.supply_balance[i, s], 0.0)
+                if (i, s) in self.model.supply_balance else 0.0
+                for i in self.model.set_i
+            ]
+        return duals
+
+    def get_x_dict(self) -> Dict[tuple, float]:
+        return {(j, s): pe.value(self.model.x[j, s], exception=False) or 0.0
+                for j in self.model.set_j for s in self.model.set_s}
@@ -0,0 +1,106 @@
+import datetime
+import pyomo.environ as pe
+import logging
+from typing import Dict, List
+from .. import do
+from ..utils.timing import record_time_decorator
+from .horizon_master_problem import HorizonMasterProblem
+from .solver import DEFAULT_SOLVER_NAME
+
+
+class HorizonOriginalProblem(HorizonMasterProblem):
+    """
+    多日联合原问题：x[j, s] 取整数，需求约束与联合主问题相同
+    """
+
+    def __init__(self, date_demand_dict: Dict[datetime.date, Dict[float, do.Demand]],
+                 demand_dict: Dict[float, do.Demand],
+                 pattern_dict: Dict[int, do.Pattern],
+                 min_pattern_used_num: int = 0,
+                 holding_cost: float = 0.0,
+                 solver_name: str = DEFAULT_SOLVER_NAME):
+        super(HorizonOriginalProblem, self).__init__(
+            date_demand_dict=date_demand_dict,
+            demand_dict=demand_dict,
+            pattern_dict=pattern_dict,
+            holding_cost=holding_cost,
+            solver_name=solver_name
+        )
+        self.model = pe.ConcreteModel('HorizonOriginal')
+        self.min_pattern_used_num = min_pattern_used_num
+
+    def create_vars(self):
+        self.model.x = pe.Var(self.model.set_j, self.model.set_s, name='x', within=pe.NonNegativeIntegers)
+        self.model.f = pe.Var(self.model.set_f, name='f', within=pe.NonNegativeReals)
+
+    def create_constraints(self):
+        super().create_constraints()
+        self.create_min_pattern_used_num_constr()
+
+    @property
+    def max_pattern_used_num(self):
+        """
+        有方案使用下限时，x <= M * 是否使用 中的 M 也是每个 (方案, 日期) 的使用上限；无下限时不限
+        """
+        if self.min_pattern_used_num is None or self.min_pattern_used_num <= 1:
+            return None
+        return 10 * len(self.demand_dict)
+
+    def create_min_pattern_used_num_constr(self):
+        if self.min_pattern_used_num is None or self.min_pattern_used_num <= 1:
+            logging.info("No min pattern used num limit.")
+            return
+        self.model.whether_pattern_used_var = pe.Var(self.model.set_j, self.model.set_s, within=pe.Binary)
+
+        def whether_pattern_used_rule(model, j, s):
+            return model.x[j, s] <= self.max_pattern_used_num * model.whether_pattern_used_var[j, s]
+
+        self.model.whether_pattern_used_constr = pe.Constraint(self.model.set_j, self.model.set_s,
+                                                               rule=whether_pattern_used_rule)
+
+        def min_pattern_used_num_rule(model, j, s):
+            return model.x[j, s] >= self.min_pattern_used_num * model.whether_pattern_used_var[j, s]
+
+        self.model.min_pattern_used_constr = pe.Constraint(self.model.set_j, self.model.set_s,
+                                                           rule=min_pattern_used_num_rule)
+        logging.info("created min_pattern_used_constr: {}".format(len(self.model.min_pattern_used_constr)))
+
+    @record_time_decorator(task_name="原问题求解时长")
+    def solve_model(self, incumbent: Dict[tuple, int] = None):
+        """
+        求解整数模型；若给出初始可行解，则在求解器支持 warm start 时作为初始解，否则只作为兜底：
+        求解未得到可行解或结果更差（如达到时间上限）时直接采用该可行解
+        :param incumbent: 初始可行解 {(pattern_id, 日期): 使用次数}
+        :return: 卷数，{日期：[[各幅宽切割段数, 使用次数]]}
+        """
+        warmstart = incumbent is not None and self.opt.warm_start_capable()
+        if warmstart:
+            for (j, s) in self.model.x:
+                self.model.x[j, s].set_value(incumbent.get((j, s), 0))
+                if hasattr(self.model, 'whether_pattern_used_var'):
+                    self.model.whether_pattern_used_var[j, s].set_value(1 if incumbent.get((j, s), 0) > 0 else 0)
+        results = self.opt.solve(self.model, tee=True, mip_gap=0.001, time_limit=30, warmstart=warmstart,
+                                 load_solutions=False)
+        obj, x_dict = None, dict()
+        if self.opt.load_feasible_solution(model=self.model, results=results):
+            x_dict = {(j, s): pe.value(self.model.x[j, s], exception=False) for (j, s) in self.model.x}
+            obj = None if any(times is None for times in x_dict.values()) else sum(x_dict.values())
+        else:
+            logging.warning("MIP returned no feasible solution: {}".format(results.solver.termination_condition))
+
+        if incumbent is not None:
+            incumbent_obj = sum(incumbent.values())
+            if obj is None or obj > incumbent_obj + 1e-6:
+                logging.info("MIP solution {} is not better than incumbent {}, use incumbent.".format(
+                    obj, incumbent_obj))
+                obj, x_dict = incumbent_obj, incumbent
+        return obj, self.get_cut_used_by_date(x_dict=x_dict)
+
+    def get_cut_used_by_date(self, x_dict: Dict[tuple, float]) -> Dict[datetime.date, List[list]]:
+        cut_used_dict = {s: [] for s in self.date_list}
+        for (pattern_id, s), times in x_dict.items():
+            if times < 1e-4:
+                continue
+            sol = self.pattern_matrix.column(pattern_id).tolist()
+            cut_used_dict[s].append([sol, round(times)])
+        return cut_used_dict
@@ -0,0 +1,96 @@
+import heapq
+import itertools
+from typing import List
+from ..utils.cut_rule import CutRule
+from ..utils.timing import record_time_decorator
+
+
+class KnapsackSubProblem:
+    """
+    子问题的分支定界求解：不依赖外部求解器，在幅宽上枚举最多 max_cut + 1 段的组合。
+    幅宽按 对偶值/幅宽 从大到小排序，用 剩余段数 和 剩余宽度 两个上界剪枝。
+    接口与 SubProblem 相同，solve_model 返回 (obj, column, remain)。
+    """
+
+    def __init__(
+            self
+            , input_data
+            , duals
+            , demand_dict
+    ):
+        self.cut_rule = CutRule(input_data=input_data)
+        self.original_size = input_data.original_size
+        self.size_array = [d for d in demand_dict]
+        self.duals = list(duals)
+
+        self.order: List[int] = list()
+        self.ratio_bound: List[float] = list()
+        self.dual_bound: List[float] = list()
+
+    def build_model(self):
+        """
+        排序并预先计算每个位置之后的上界：最大 对偶值/幅宽，最大对偶值
+        """
+        candidate = [i for i in range(len(self.size_array)) if self.size_array[i] > 0]
+        self.order = sorted(candidate, key=lambda i: self.duals[i] / self.size_array[i], reverse=True)
+
+        self.ratio_bound = [0.0] * (len(self.order) + 1)
+        self.dual_bound = [0.0] * (len(self.order) + 1)
+        for pos in range(len(self.order) - 1, -1, -1):
+            i = self.order[pos]
+            self.ratio_bound[pos] = max(self.ratio_bound[pos + 1], self.duals[i] / self.size_array[i], 0.0)
+            self.dual_bound[pos] = max(self.dual_bound[pos + 1], self.duals[i], 0.0)
+
+    def solve_model(self):
+        return self.solve_top_k(k=1)[0]
+
+    @record_time_decorator(task_name="子问题求解时长")
+    def solve_top_k(self, k: int):
+        """
+        返回对偶值之和最大的 k 个互不相同的可行方案，按 obj 从大到小排列
+        :param k: 最多返回的方案个数
+        :return: [(obj, column, remain)]
+        """
+        cut_rule = self.cut_rule
+        max_piece_num = cut_rule.max_piece_num
+        min_remain = cut_rule.waste_low_limit - cut_rule.tolerance
+        count = [0] * len(self.size_array)
+        # 小顶堆，堆顶为当前第 k 好的方案；不切任何幅宽(obj=0)总是可行的，作为下界
+        heap = []
+        sequence = itertools.count()
+
+        def threshold():
+            return heap[0][0] if len(heap) >= k else 0.0
+
+        def search(pos: int, piece_num: int, remain: float, value: float):
+            if value > threshold() + 1e-9 and cut_rule.is_feasible(piece_num=piece_num, remain=remain):
+                item = (value, next(sequence), list(count), remain)
+                if len(heap) >= k:
+                    heapq.heapreplace(heap, item)
+                else:
+                    heapq.heappush(heap, item)
+            if piece_num == max_piece_num:
+                return
+            for next_pos in range(pos, len(self.order)):
+                bound = value + min(
+                    (max_piece_num - piece_num) * self.dual_bound[next_pos],
+                    (remain - cut_rule.waste_low_limit) * self.ratio_bound[next_pos]
+                )
+                if bound <= threshold() + 1e-9:
+                    # 上界随位置单调不增，后面的幅宽也无法改进
+                    break
+                i = self.order[next_pos]
+                if remain - self.size_array[i] < min_remain:
+                    continue
+                count[i] += 1
+                search(next_pos, piece_num + 1, remain - self.size_array[i], value + self.duals[i])
+                count[i] -= 1
+
+        search(pos=0, piece_num=0, remain=self.original_size, value=0.0)
+
+        if not heap:
+            return [(0.0, [0.0] * len(self.size_array), self.original_size)]
+        return [
+            (obj, [float(c) for c in column], remain)
+            for (obj, _, column, remain) in sorted(heap, key=lambda x: (-x[0], x[1]))
+        ]
@@ -2,18 +2,25 @@ import pyomo.environ as pe
 import logging
 from typing import Dict
 from .. import do
+from ..utils.timing import record_time_decorator
+from .solver import Solver, DEFAULT_SOLVER_NAME
 
 
 class MasterProblem:
 
     def __init__(self, demand_dict: Dict[float, do.Demand],
-                 pattern_dict: Dict[str, do.Pattern]):
+                 pattern_dict: Dict[str, do.Pattern],
+                 solver_name: str = DEFAULT_SOLVER_NAME):
         self.demand_dict = demand_dict
         self.pattern_dict = pattern_dict
+        self.pattern_matrix = do.PatternMatrix.from_pattern_dict(
+            size_list=[size for size in demand_dict],
+            pattern_dict=pattern_dict
+        )
         # create model
         self.model = pe.ConcreteModel('Master')
         self.model.dual = pe.Suffix(direction=pe.Suffix.IMPORT)
-        self.opt = pe.SolverFactory("glpk")
+        self.opt = Solver(solver_name=solver_name)
         # self.opt.options['OutputFlag'] = 1
 
     def build_model(self):
@@ -23,9 +30,9 @@ class MasterProblem:
         self.create_obj()
 
     def create_sets(self):
-        self.model.set_i = [size for size in self.demand_dict]
+        self.model.set_i = pe.Set(initialize=[size for size in self.demand_dict], ordered=True)
         # logging.info('set_i created with I = {}'.format(len(self.demand_list)))
-        self.model.set_j = [p for p in self.pattern_dict]
+        self.model.set_j = pe.Set(initialize=[p for p in self.pattern_dict], ordered=True)
         # logging.info('set_j created with J = {}'.format(len(self.pattern_mode)))
 
     def create_vars(self):
@@ -39,8 +46,9 @@ class MasterProblem:
 
         # demand satisfying constraints
         def demand_satisfaction(model, i):
-            return sum(self.pattern_dict[j].mode.get(i, 0) * self.model.x[j]
-                       for j in self.model.set_j) == self.demand_dict[i].amount
+            pattern_id_list, qty_list = self.pattern_matrix.row_nonzero(i)
+            return sum(qty * self.model.x[j]
+                       for j, qty in zip(pattern_id_list, qty_list)) == self.demand_dict[i].amount
 
         self.model.demand_satisfaction = pe.Constraint(self.model.set_i, rule=demand_satisfaction)
         # logging.info('constraints demand_satisfaction created: {}'.format(len(self.model.demand_satisfaction)))
@@ -49,12 +57,36 @@ class MasterProblem:
         self.model.obj = pe.Objective(expr=sum(self.model.x[j] for j in self.model.set_j), sense=pe.minimize)
         # logging.info('objective created')
 
+    def add_pattern(self, pattern: do.Pattern):
+        """
+        在已建好的模型上追加一列：新增 x[j]，并只更新该列涉及的需求约束与目标函数
+        :param pattern: 新生成的切割方案，需已加入 pattern_dict
+        """
+        j = pattern.pattern_id
+        self.pattern_matrix.add_pattern(pattern)
+        self.model.set_j.add(j)
+        x_j = self.model.x[j]
+        ctr_list = []
+        for size, qty in zip(*self.pattern_matrix.column_nonzero(j)):
+            ctr = self.model.demand_satisfaction[size]
+            if ctr.equality:
+                ctr.set_value(ctr.body + qty * x_j == ctr.upper)
+            else:
+                ctr.set_value((ctr.lower, ctr.body + qty * x_j, ctr.upper))
+            ctr_list.append(ctr)
+        self.model.obj.expr = self.model.obj.expr + x_j
+        self.opt.update_column(var=x_j, constraint_list=ctr_list, objective=self.model.obj)
+
+    @record_time_decorator(task_name="主问题求解时长")
     def solve_model(self):
-        self.opt.solve(self.model)
+        self.opt.solve(self.model, load_duals=True)
         duals = self.get_duals()
         obj = pe.value(self.model.obj)
         return obj, duals
 
+    def get_x_dict(self) -> Dict[int, float]:
+        return {j: pe.value(self.model.x[j], exception=False) or 0.0 for j in self.model.set_j}
+
     def get_duals(self):
         duals = []
         # get duals for all constraints (demands)
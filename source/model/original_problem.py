@@ -3,7 +3,9 @@ from typing import Dict
 import pandas as pd
 import logging
 from .. import do
+from ..utils.timing import record_time_decorator
 from .master_problem import MasterProblem
+from .solver import DEFAULT_SOLVER_NAME
 
 
 class OriginalProblem(MasterProblem):
@@ -13,10 +15,12 @@ class OriginalProblem(MasterProblem):
             , demand_dict: Dict[float, do.Demand]
             , pattern_dict: Dict[str, do.Pattern]
             , min_pattern_used_num: int = 0
+            , solver_name: str = DEFAULT_SOLVER_NAME
     ):
         super(OriginalProblem, self).__init__(
             demand_dict=demand_dict
             , pattern_dict=pattern_dict
+            , solver_name=solver_name
         )
 
         # create model
@@ -40,8 +44,9 @@ class OriginalProblem(MasterProblem):
 
         # demand satisfying constraints
         def demand_satisfaction(model, i):
-            return sum(self.pattern_dict[j].mode.get(i, 0) * self.model.x[j]
-                       for j in self.model.set_j) >= self.demand_dict[i].amount
+            pattern_id_list, qty_list = self.pattern_matrix.row_nonzero(i)
+            return sum(qty * self.model.x[j]
+                       for j, qty in zip(pattern_id_list, qty_list)) >= self.demand_dict[i].amount
 
         self.model.demand_satisfaction = pe.Constraint(self.model.set_i, rule=demand_satisfaction)
         # logging.info('constraints demand_satisfaction created: {}'.format(len(self.model.demand_satisfaction)))
@@ -50,6 +55,15 @@ class OriginalProblem(MasterProblem):
         super().create_constraints()
         self.create_min_pattern_used_num_constr()
 
+    @property
+    def max_pattern_used_num(self):
+        """
+        有方案使用下限时，x <= M * 是否使用 中的 M 也是每个方案的使用上限；无下限时不限
+        """
+        if self.min_pattern_used_num is None or self.min_pattern_used_num <= 1:
+            return None
+        return 10 * len(self.demand_dict)
+
     def create_min_pattern_used_num_constr(self):
         if self.min_pattern_used_num is None or self.min_pattern_used_num <= 1:
             logging.info("No min pattern used num limit.")
@@ -57,7 +71,7 @@ class OriginalProblem(MasterProblem):
         self.create_whether_pattern_used_var()
 
         def whether_pattern_used_rule(model, j):
-            return model.x[j] <= 10*len(self.demand_dict) * model.whether_pattern_used_var[j]
+            return model.x[j] <= self.max_pattern_used_num * model.whether_pattern_used_var[j]
 
         self.model.whether_pattern_used_constr = pe.Constraint(self.model.set_j, rule=whether_pattern_used_rule)
         logging.info("created whether_pattern_used_constr: {}".format(len(self.model.whether_pattern_used_constr)))
@@ -71,15 +85,65 @@ class OriginalProblem(MasterProblem):
     def create_obj(self):
         super().create_obj()
 
-    def solve_model(self):
-        self.opt.solve(self.model, tee=True, options={'mipgap': 0.001, 'tmlim': 30})
+    @record_time_decorator(task_name="原问题松弛求解时长")
+    def solve_relaxation(self):
+        """
+        临时把整数变量放松为连续变量求解线性松弛，求解后恢复变量类型
+        :return: 线性松弛目标值（原问题下界），{pattern_id: 使用次数}
+        """
+        domain_list = [(self.model.x, pe.NonNegativeReals, pe.NonNegativeIntegers)]
+        if hasattr(self.model, 'whether_pattern_used_var'):
+            domain_list.append((self.model.whether_pattern_used_var, pe.UnitInterval, pe.Binary))
+        for var, relaxed_domain, _ in domain_list:
+            for v in var.values():
+                v.domain = relaxed_domain
+        self.opt.update_var_list(var_list=[v for var, _, _ in domain_list for v in var.values()])
+        self.opt.solve(self.model)
         obj = pe.value(self.model.obj)
         x_dict = {j: pe.value(self.model.x[j]) for j in self.model.set_j}
-
+        for var, _, domain in domain_list:
+            for v in var.values():
+                v.domain = domain
+        self.opt.update_var_list(var_list=[v for var, _, _ in domain_list for v in var.values()])
+        return obj, x_dict
+
+    @record_time_decorator(task_name="原问题求解时长")
+    def solve_model(self, incumbent: Dict[int, int] = None):
+        """
+        求解整数模型；若给出初始可行解，则在求解器支持 warm start 时（如 cbc、gurobi、cplex）作为初始解，
+        glpk 与 appsi 求解器不支持 warm start，此时初始可行解只作为兜底：
+        求解未得到可行解或结果更差（如达到时间上限）时直接采用该可行解
+        :param incumbent: 初始可行解 {pattern_id: 使用次数}
+        :return: 目标值，[[各幅宽切割段数, 使用次数]]
+        """
+        warmstart = incumbent is not None and self.opt.warm_start_capable()
+        if warmstart:
+            for j in self.model.set_j:
+                self.model.x[j].set_value(incumbent.get(j, 0))
+                if hasattr(self.model, 'whether_pattern_used_var'):
+                    self.model.whether_pattern_used_var[j].set_value(1 if incumbent.get(j, 0) > 0 else 0)
+        results = self.opt.solve(self.model, tee=True, mip_gap=0.001, time_limit=30, warmstart=warmstart,
+                                 load_solutions=False)
+        obj, x_dict = None, dict()
+        if self.opt.load_feasible_solution(model=self.model, results=results):
+            obj = pe.value(self.model.obj, exception=False)
+            x_dict = {j: pe.value(self.model.x[j], exception=False) for j in self.model.set_j}
+        else:
+            logging.warning("MIP returned no feasible solution: {}".format(results.solver.termination_condition))
+
+        if incumbent is not None:
+            incumbent_obj = sum(incumbent.values())
+            if obj is None or any(times is None for times in x_dict.values()) or obj > incumbent_obj + 1e-6:
+                logging.info("MIP solution {} is not better than incumbent {}, use incumbent.".format(
+                    obj, incumbent_obj))
+                obj, x_dict = incumbent_obj, incumbent
+        return obj, self.get_cut_used(x_dict=x_dict)
+
+    def get_cut_used(self, x_dict: Dict[int, float]):
         cut_used = []
         for pattern_id, times in x_dict.items():
             if times < 1e-4:
                 continue
-            sol = [self.pattern_dict[pattern_id].mode.get(size, 0) for size in self.demand_dict]
+            sol = self.pattern_matrix.column(pattern_id).tolist()
             cut_used.append([sol, times])
-        return obj, cut_used
+        return cut_used
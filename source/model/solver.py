@@ -0,0 +1,156 @@
+import logging
+import pyomo.environ as pe
+from pyomo.opt import SolutionStatus, TerminationCondition
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+from ..utils.log_setup import SOLVER_OUTPUT_LOGGER_NAME
+
+DEFAULT_SOLVER_NAME = 'glpk'
+
+# 不同求解器的 相对间隙 与 时间上限 参数名
+OPTION_NAME_DICT = {
+    'glpk': ('mipgap', 'tmlim'),
+    'cbc': ('ratioGap', 'seconds'),
+    'highs': ('mip_rel_gap', 'time_limit'),
+    'gurobi': ('MIPGap', 'TimeLimit'),
+    'cplex': ('mip_tolerances_mipgap', 'timelimit'),
+}
+
+# 求解结束时可能带有可行解的终止条件与解状态（如达到时间上限时的当前最好解）
+FEASIBLE_TERMINATION_SET = {
+    TerminationCondition.optimal,
+    TerminationCondition.feasible,
+    TerminationCondition.locallyOptimal,
+    TerminationCondition.globallyOptimal,
+    TerminationCondition.maxTimeLimit,
+    TerminationCondition.maxIterations,
+    TerminationCondition.maxEvaluations,
+}
+FEASIBLE_SOLUTION_STATUS_SET = {
+    SolutionStatus.optimal,
+    SolutionStatus.feasible,
+    SolutionStatus.locallyOptimal,
+    SolutionStatus.globallyOptimal,
+    SolutionStatus.bestSoFar,
+    SolutionStatus.stoppedByLimit,
+}
+
+
+class Solver:
+    """
+    对 pe.SolverFactory 的封装，统一各求解器的参数名、warm start 和对偶值读取：
+    1. glpk、cbc 等通过命令行调用，每次求解读写模型文件；
+    2. appsi_highs 等 appsi 求解器常驻进程内，自动识别模型的增量修改，线性规划从上一次的基继续求解；
+    3. gurobi_persistent 等持久化求解器在首次求解时载入模型，之后的修改需通过 update_column 等同步。
+    求解器不可用时回退到 glpk。
+    warm start 只传给支持的求解器（如 cbc、gurobi、cplex），glpk 与 appsi 求解器会忽略。
+    appsi 求解器求解时会捕获 stdout/stderr，因此不传 tee，求解日志写入不向根记录器传递的单独记录器。
+    """
+
+    def __init__(self, solver_name: str = DEFAULT_SOLVER_NAME):
+        opt = pe.SolverFactory(solver_name)
+        if solver_name != DEFAULT_SOLVER_NAME and not opt.available(exception_flag=False):
+            logging.warning("solver {} is not available, use {} instead.".format(solver_name, DEFAULT_SOLVER_NAME))
+            solver_name = DEFAULT_SOLVER_NAME
+            opt = pe.SolverFactory(solver_name)
+        self.solver_name = solver_name
+        self.opt = opt
+        self.is_persistent = isinstance(opt, PersistentSolver)
+        self.is_appsi = solver_name.startswith('appsi_')
+        self.instance = None
+        if self.is_appsi:
+            solver_logger = logging.getLogger(SOLVER_OUTPUT_LOGGER_NAME)
+            solver_logger.propagate = False
+            self.opt.config.solver_output_logger = solver_logger
+
+    @property
+    def solver_family(self):
+        return self.solver_name.replace('appsi_', '').split('_')[0]
+
+    def warm_start_capable(self) -> bool:
+        warm_start_capable = getattr(self.opt, 'warm_start_capable', None)
+        return warm_start_capable is not None and warm_start_capable()
+
+    def get_options(self, mip_gap: float = None, time_limit: float = None) -> dict:
+        if mip_gap is None and time_limit is None:
+            return {}
+        if self.solver_family not in OPTION_NAME_DICT:
+            logging.warning("unknown option names for solver {}, mip gap and time limit are ignored.".format(
+                self.solver_name))
+            return {}
+        mip_gap_name, time_limit_name = OPTION_NAME_DICT[self.solver_family]
+        options = {}
+        if mip_gap is not None:
+            options[mip_gap_name] = mip_gap
+        if time_limit is not None:
+            options[time_limit_name] = time_limit
+        return options
+
+    def solve(
+            self,
+            model: pe.ConcreteModel,
+            tee: bool = False,
+            mip_gap: float = None,
+            time_limit: float = None,
+            warmstart: bool = False,
+            load_duals: bool = False,
+            load_solutions: bool = True
+    ):
+        """
+        :param load_solutions: 为 False 时不把解载入模型，由 load_feasible_solution 检查求解状态后载入；
+            appsi 求解器在载入解时若没有可行解（如达到时间上限）会直接抛出异常
+        """
+        solve_kwargs = {} if self.is_appsi else {'tee': tee}
+        if not load_solutions:
+            solve_kwargs['load_solutions'] = False
+        options = self.get_options(mip_gap=mip_gap, time_limit=time_limit)
+        if options:
+            solve_kwargs['options'] = options
+        if warmstart and self.warm_start_capable():
+            solve_kwargs['warmstart'] = True
+
+        if not self.is_persistent:
+            return self.opt.solve(model, **solve_kwargs)
+
+        if self.instance is not model:
+            self.opt.set_instance(model)
+            self.instance = model
+        results = self.opt.solve(**solve_kwargs)
+        if load_duals:
+            self.opt.load_duals()
+        return results
+
+    def load_feasible_solution(self, model: pe.ConcreteModel, results) -> bool:
+        """
+        以 load_solutions=False 求解后，若求解器找到了可行解则载入模型
+        :return: 是否载入了可行解
+        """
+        if results.solver.termination_condition not in FEASIBLE_TERMINATION_SET:
+            return False
+        if self.is_persistent:
+            self.opt.load_vars()
+            return True
+        if len(results.solution) == 0 or results.solution(0).status not in FEASIBLE_SOLUTION_STATUS_SET:
+            return False
+        model.solutions.load_from(results)
+        return True
+
+    def update_column(self, var: pe.Var, constraint_list: list, objective: pe.Objective):
+        """
+        Pyomo 模型中新增一列后，同步到持久化求解器
+        """
+        if not self.is_persistent or self.instance is None:
+            return
+        self.opt.add_var(var)
+        for constraint in constraint_list:
+            self.opt.remove_constraint(constraint)
+            self.opt.add_constraint(constraint)
+        self.opt.set_objective(objective)
+
+    def update_var_list(self, var_list: list):
+        """
+        Pyomo 模型中变量类型或上下界修改后，同步到持久化求解器
+        """
+        if not self.is_persistent or self.instance is None:
+            return
+        for var in var_list:
+            self.opt.update_var(var)
@@ -1,6 +1,8 @@
 import pyomo.environ as pe
 from typing import Dict
 from .. import do
+from ..utils.timing import record_time_decorator
+from .solver import Solver
 
 
 class SubProblem:
@@ -21,7 +23,7 @@ class SubProblem:
 
         # create model
         self.model = pe.ConcreteModel('Sub')
-        self.opt = pe.SolverFactory("glpk")
+        self.opt = Solver(solver_name=input_data.solver_name)
         # self.opt.options['OutputFlag'] = 1
 
         # create parameters
@@ -102,6 +104,15 @@ class SubProblem:
         column = [pe.value(self.model.y_i[i]) for i in self.model.set_i]
         return obj, column, remain
 
+    @record_time_decorator(task_name="子问题求解时长")
+    def solve_top_k(self, k: int):
+        """
+        整数规划每次只给出一个最优方案，k 大于 1 时同样只返回一个
+        :param k: 最多返回的方案个数
+        :return: [(obj, column, remain)]
+        """
+        return [self.solve_model()]
+
     def solution_dict(self):
         sol_dict = {}
         for k, v in self.model.component_map(ctype=pe.Var).items():
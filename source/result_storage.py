@@ -1,44 +1,108 @@
+import datetime
+import time
+import bisect
+import numpy as np
 import pandas as pd
-from typing import Dict, Tuple, List, Union
+import heapq
+import itertools
+from typing import Dict, Tuple, List, Set, Deque
 from itertools import chain
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 from .input_data import InputData
 from . import do
 from .utils import timing
 from .utils import header
 from .utils import filename
+from .utils.table_writer import TableWriter, get_output_path, write_table
 
 
 class ResultStorage:
     def __init__(self, input_data: InputData):
         self.input_data = input_data
-        self.solution_dict: Dict[str, do.Solution] = dict()
+        self.solution_dict: Dict[datetime.date, do.Solution] = dict()
         self.supply_dict: Dict[Tuple[str, int, float], do.Supply] = dict()
+        self.convergence_list: List[dict] = []
+
+        self.date_rank_dict: Dict[datetime.date, int] = self.generate_date_rank_dict()
+        self.supply_sequence = itertools.count()
+        self.open_supply_dict: Dict[float, List[Tuple[int, int, Tuple[str, int, float]]]] = dict()
+        self.open_supply_key_set: Set[Tuple[str, int, float]] = set()
+        self.open_demand_dict: Dict[float, Deque[Tuple[int, str]]] = dict()
+        # 每个幅宽全部日期的剩余需求，随供需匹配和补库增量更新
+        self.open_size_dict: Dict[float, do.Size] = dict()
+        self.generate_open_queue()
+        # 按日期追加写出的输出表 {输出文件名：TableWriter}
+        self.writer_dict: Dict[str, TableWriter] = dict()
+        # 上次取出后新增或变化的供应与需求 {id：对象}，供检查点只保存增量
+        self.changed_supply_dict: Dict[int, do.Supply] = dict()
+        self.changed_demand_dict: Dict[int, do.Demand] = dict()
 
     # region dump
-    def dict_to_list(self, d: dict):
-        result = sorted(list(chain.from_iterable([[k] * int(v) for k, v in d.items()])))
-        while len(result) < self.input_data.max_cut + 1:
-            result.append(pd.NaT)
-        return result
+    def dict_to_list(self, d: dict) -> List[float]:
+        """
+        :param d: {幅宽：段数}
+        :return: 按幅宽从小到大展开的各段幅宽
+        """
+        return sorted(chain.from_iterable([[k] * int(v) for k, v in d.items()]))
+
+    @staticmethod
+    def to_date_array(date_list: list) -> pd.DatetimeIndex:
+        return pd.to_datetime(pd.Index(date_list, dtype=object))
 
     def dump(self):
-        sol_df = self.output_sol()
-        supply_df = self.output_supply()
-        demand_df = self.output_demand()
-        fulfillment_df = self.output_fulfillment()
-        kpi_df = self.output_kpi()
-
-        return {
-            "kpiOut.csv": kpi_df,
-            "solutionOut.csv": sol_df,
-            "supplyOut.csv": supply_df,
-            "demandOut.csv": demand_df,
-            "fulfillmentOut.csv": fulfillment_df
+        output_dict = {
+            filename.OUT_KPI_FILE: self.output_kpi(),
+            filename.OUT_SOLUTION_FILE: self.output_sol(),
+            filename.OUT_SUPPLY_FILE: self.output_supply(),
+            filename.OUT_DEMAND_FILE: self.output_demand(),
+            filename.OUT_FULFILLMENT_FILE: self.output_fulfillment(),
+            filename.OUT_CONVERGENCE_FILE: self.output_convergence()
         }
+        if self.input_data.load_from_file:
+            for file_name, df in output_dict.items():
+                # 已按日期写出的表只需关闭
+                if file_name in self.writer_dict:
+                    continue
+                write_table(df=df, path=self.get_output_path(file_name=file_name),
+                            output_format=self.input_data.output_format)
+            self.close_writers()
+        return output_dict
+
+    def get_output_path(self, file_name: str) -> str:
+        return get_output_path(output_folder=self.input_data.output_folder, file_name=file_name,
+                               output_format=self.input_data.output_format)
 
-    def output_sol(self):
+    def stream_date(self, date: datetime.date):
+        """
+        日期的供需匹配和后处理完成后，追加写出该日期不再变化的行：该日期的切割方案，以及需求日期为该日期的需求与供需匹配。
+        供应的剩余数量在之后日期的供需匹配中还会变化，供应表仍在 dump 时整表写出
+        :param date: 处理完成的日期
+        """
+        if not self.input_data.load_from_file:
+            return
+        for file_name, output_func in (
+                (filename.OUT_SOLUTION_FILE, self.output_sol),
+                (filename.OUT_DEMAND_FILE, self.output_demand),
+                (filename.OUT_FULFILLMENT_FILE, self.output_fulfillment)
+        ):
+            df = output_func(date_list=[date])
+            if file_name not in self.writer_dict:
+                self.writer_dict[file_name] = TableWriter(
+                    path=self.get_output_path(file_name=file_name),
+                    output_format=self.input_data.output_format,
+                    columns=list(df.columns)
+                )
+            self.writer_dict[file_name].write(df)
+
+    def close_writers(self):
+        for writer in self.writer_dict.values():
+            writer.close()
+
+    def output_sol(self, date_list: List[datetime.date] = None):
+        """
+        :param date_list: 只输出这些日期的切割方案，为空时输出全部日期
+        """
         osh = header.OutSolutionHeader
         mode_col = ['切割方案_第{}段'.format(i)
                     for i in range(1, self.input_data.max_cut + 2)]
@@ -49,33 +113,37 @@ class ResultStorage:
             col.remove(osh.waste)
         if self.input_data.whether_process_remain:
             col.append(osh.added_cuts)
-        record_lt = []
-
-        for date, solutions in self.solution_dict.items():
-            for pattern_id, pattern in solutions.pattern_used_dict.items():
-                remain_qty = round(pattern.remain)
-                remain = remain_qty
-                waste = pd.NaT
-                if self.input_data.consider_waste:
-                    remain = remain_qty if remain_qty >= self.input_data.remain_low_limit else pd.NaT
-                    waste = remain_qty if remain_qty < self.input_data.remain_low_limit else pd.NaT
-                record = {
-                    osh.date: date,
-                    osh.used_times: round(pattern.used_times),
-                    osh.original_size: self.input_data.original_size,
-                    osh.remain: remain,
-                    osh.waste: waste,
-                    osh.pattern_id: pattern_id,
-                    osh.added_cuts: ';'.join([str(cut) for cut in pattern.added_cuts])
-                }
-                mode_value_list = self.dict_to_list(pattern.mode)
-                record.update(
-                    dict(zip(mode_col, mode_value_list))
-                )
-                record_lt.append(record)
-        sol_df = pd.DataFrame(record_lt, columns=col, dtype=object)
-        if self.input_data.load_from_file:
-            sol_df.to_csv('{}{}'.format(self.input_data.output_folder, filename.OUT_SOLUTION_FILE), index=False)
+
+        pattern_list = [
+            (date, pattern_id, pattern)
+            for date, solution in self.solution_dict.items() if date_list is None or date in date_list
+            for pattern_id, pattern in solution.pattern_used_dict.items()
+        ]
+        # 各段幅宽，不足 max_cut + 1 段的以 NaN 补齐
+        mode_array = np.full((len(pattern_list), len(mode_col)), np.nan)
+        for row, (_, _, pattern) in enumerate(pattern_list):
+            cut_list = self.dict_to_list(pattern.mode)[:len(mode_col)]
+            mode_array[row, :len(cut_list)] = cut_list
+
+        remain_array = np.array([round(pattern.remain) for (_, _, pattern) in pattern_list], dtype=float)
+        waste_array = np.full(len(pattern_list), np.nan)
+        if self.input_data.consider_waste:
+            is_remain = remain_array >= self.input_data.remain_low_limit
+            waste_array = np.where(is_remain, np.nan, remain_array)
+            remain_array = np.where(is_remain, remain_array, np.nan)
+
+        column_dict = {
+            osh.date: self.to_date_array([date for (date, _, _) in pattern_list]),
+            osh.used_times: np.array([round(pattern.used_times) for (_, _, pattern) in pattern_list], dtype=int),
+            osh.original_size: np.full(len(pattern_list), self.input_data.original_size),
+            osh.remain: remain_array,
+            osh.waste: waste_array,
+            osh.pattern_id: np.array([pattern_id for (_, pattern_id, _) in pattern_list], dtype=int),
+            osh.added_cuts: pd.array([';'.join([str(cut) for cut in pattern.added_cuts])
+                                      for (_, _, pattern) in pattern_list], dtype='string')
+        }
+        column_dict.update(dict(zip(mode_col, mode_array.T)))
+        sol_df = pd.DataFrame({c: column_dict[c] for c in col}, columns=col)
         return sol_df
 
     def output_supply(self):
@@ -87,22 +155,21 @@ class ResultStorage:
             osh.supply_amount,
             osh.unfulfilled_amount
         ]
-        record_lt = []
-        for (date, pattern, size), supply in self.supply_dict.items():
-            record = {
-                osh.date: date,
-                osh.pattern_id: pattern,
-                osh.size: size,
-                osh.supply_amount: round(supply.supply_amount),
-                osh.unfulfilled_amount: round(supply.amount)
-            }
-            record_lt.append(record)
-        supply_df = pd.DataFrame(record_lt, columns=col, dtype=object)
-        if self.input_data.load_from_file:
-            supply_df.to_csv('{}{}'.format(self.input_data.output_folder, filename.OUT_SUPPLY_FILE), index=False)
+        key_list = list(self.supply_dict)
+        supply_list = list(self.supply_dict.values())
+        supply_df = pd.DataFrame({
+            osh.date: self.to_date_array([date for (date, _, _) in key_list]),
+            osh.pattern_id: np.array([pattern_id for (_, pattern_id, _) in key_list], dtype=int),
+            osh.size: np.array([size for (_, _, size) in key_list]),
+            osh.supply_amount: np.array([round(supply.supply_amount) for supply in supply_list], dtype=int),
+            osh.unfulfilled_amount: np.array([round(supply.amount) for supply in supply_list], dtype=int)
+        }, columns=col)
         return supply_df
 
-    def output_demand(self):
+    def output_demand(self, date_list: List[datetime.date] = None):
+        """
+        :param date_list: 只输出这些需求日期的需求，为空时输出全部日期
+        """
         odh = header.OutDemandHeader
         col = [
             odh.date,
@@ -110,24 +177,23 @@ class ResultStorage:
             odh.demand_amount,
             odh.unfulfilled_amount
         ]
-        record_lt = []
-        for date, demand_dict in self.input_data.demand_dict.items():
-            for size, demand in demand_dict.items():
-                record = {
-                    odh.date: date,
-                    odh.size: size,
-                    odh.demand_amount: demand.original_amount,
-                    odh.unfulfilled_amount: round(demand.amount)
-                }
-                record_lt.append(record)
-
-        demand_df = pd.DataFrame(record_lt, columns=col, dtype=object)
-
-        if self.input_data.load_from_file:
-            demand_df.to_csv('{}{}'.format(self.input_data.output_folder, filename.OUT_DEMAND_FILE), index=False)
+        demand_list = [
+            demand for date, demand_dict in self.input_data.demand_dict.items()
+            if date_list is None or date in date_list
+            for demand in demand_dict.values()
+        ]
+        demand_df = pd.DataFrame({
+            odh.date: self.to_date_array([demand.date for demand in demand_list]),
+            odh.size: np.array([demand.size for demand in demand_list]),
+            odh.demand_amount: np.array([demand.original_amount for demand in demand_list]),
+            odh.unfulfilled_amount: np.array([round(demand.amount) for demand in demand_list], dtype=int)
+        }, columns=col)
         return demand_df
 
-    def output_fulfillment(self):
+    def output_fulfillment(self, date_list: List[datetime.date] = None):
+        """
+        :param date_list: 只输出满足这些需求日期的供需匹配，为空时输出全部日期
+        """
         ofh = header.OutFulfillmentHeader
         col = [
             ofh.size,
@@ -136,23 +202,20 @@ class ResultStorage:
             ofh.demand_date,
             ofh.supply_amount
         ]
-        record_lt = []
-        for demand_date, dmd_dict in self.input_data.demand_dict.items():
-            for size, dmd in dmd_dict.items():
-                for (supply_date, pattern_id), qty in dmd.supply_amount_dict.items():
-                    record = {
-                        ofh.size: size,
-                        ofh.supply_date: supply_date,
-                        ofh.pattern_id: pattern_id,
-                        ofh.demand_date: demand_date,
-                        ofh.supply_amount: round(qty)
-                    }
-                    record_lt.append(record)
-        fulfillment_df = pd.DataFrame(record_lt, columns=col, dtype=object)
-
-        if self.input_data.load_from_file:
-            fulfillment_df.to_csv('{}{}'.format(self.input_data.output_folder, filename.OUT_FULFILLMENT_FILE),
-                                  index=False)
+        fill_list = [
+            (dmd, supply_date, pattern_id, qty)
+            for demand_date, dmd_dict in self.input_data.demand_dict.items()
+            if date_list is None or demand_date in date_list
+            for dmd in dmd_dict.values()
+            for (supply_date, pattern_id), qty in dmd.supply_amount_dict.items()
+        ]
+        fulfillment_df = pd.DataFrame({
+            ofh.size: np.array([dmd.size for (dmd, _, _, _) in fill_list]),
+            ofh.supply_date: self.to_date_array([supply_date for (_, supply_date, _, _) in fill_list]),
+            ofh.pattern_id: np.array([pattern_id for (_, _, pattern_id, _) in fill_list], dtype=int),
+            ofh.demand_date: self.to_date_array([dmd.date for (dmd, _, _, _) in fill_list]),
+            ofh.supply_amount: np.array([round(qty) for (_, _, _, qty) in fill_list], dtype=int)
+        }, columns=col)
         return fulfillment_df
 
     def output_kpi(self):
@@ -163,26 +226,131 @@ class ResultStorage:
             okh.pattern_num,
             okh.running_time
         ]
-
-        record_lt = []
-        for date, solution in self.solution_dict.items():
-            record = {
-                okh.date: date,
-                okh.original_used_times: round(solution.used_original_roll_num),
-                okh.pattern_num: len(solution.pattern_used_dict),
-                okh.running_time: round(solution.running_time, 2)
-            }
-            record_lt.append(record)
-        kpi_df = pd.DataFrame(record_lt, columns=col, dtype=object)
-
-        if self.input_data.load_from_file:
-            kpi_df.to_csv('{}{}'.format(self.input_data.output_folder, filename.OUT_KPI_FILE), index=False)
+        if self.input_data.sort_knife_change:
+            col.insert(3, okh.knife_change_times)
+        stage_col = [
+            okh.column_generation_time,
+            okh.original_problem_time,
+            okh.fulfillment_time,
+            okh.process_remain_time,
+            okh.knife_change_time
+        ]
+        col += [c for c in stage_col if any(c in solution.stage_time_dict for solution in self.solution_dict.values())]
+
+        solution_list = list(self.solution_dict.values())
+        column_dict = {
+            okh.date: self.to_date_array(list(self.solution_dict)),
+            okh.original_used_times: np.array(
+                [round(solution.used_original_roll_num) for solution in solution_list], dtype=int),
+            okh.pattern_num: np.array([len(solution.pattern_used_dict) for solution in solution_list], dtype=int),
+            okh.knife_change_times: np.array([solution.knife_change_times for solution in solution_list]),
+            okh.running_time: np.array([round(solution.running_time, 2) for solution in solution_list], dtype=float)
+        }
+        for stage_name in stage_col:
+            # 未执行该阶段的日期为 NaN
+            column_dict[stage_name] = np.array(
+                [round(solution.stage_time_dict.get(stage_name, np.nan), 4) for solution in solution_list],
+                dtype=float)
+        kpi_df = pd.DataFrame({c: column_dict[c] for c in col}, columns=col)
         return kpi_df
 
+    def output_convergence(self):
+        och = header.OutConvergenceHeader
+        col = [
+            och.date,
+            och.iteration,
+            och.master_obj,
+            och.sub_obj,
+            och.lower_bound,
+            och.master_time,
+            och.pricing_time,
+            och.column_num,
+            och.new_column_num
+        ]
+        convergence_df = pd.DataFrame(self.convergence_list, columns=col)
+        convergence_df[och.date] = self.to_date_array(convergence_df[och.date].tolist())
+        return convergence_df
+
     # endregion
 
     # region fulfillment
-    def generate_supply_by_date(self, date: str):
+    def generate_date_rank_dict(self) -> Dict[datetime.date, int]:
+        """
+        :return: {日期：按时间先后的序号}
+        """
+        date_list = sorted(self.input_data.demand_dict)
+        return {date: rank for rank, date in enumerate(date_list)}
+
+    def generate_open_queue(self):
+        """
+        根据当前的供应和需求，重新生成每个幅宽未用完的供应（小顶堆）、未满足的需求（按日期排序）及剩余需求总量
+        """
+        self.open_supply_dict = defaultdict(list)
+        self.open_supply_key_set = set()
+        for supply in self.supply_dict.values():
+            self.register_supply(supply=supply)
+
+        open_demand_dict = defaultdict(list)
+        self.open_size_dict = dict()
+        for date, dmd_dict in self.input_data.demand_dict.items():
+            for size, demand in dmd_dict.items():
+                if size not in self.open_size_dict:
+                    self.open_size_dict[size] = do.Size(size=size)
+                self.open_size_dict[size].add_demand(demand=demand)
+                if demand.amount < 1e-2:
+                    continue
+                open_demand_dict[size].append((self.date_rank_dict[date], date))
+        self.open_demand_dict = {
+            size: deque(sorted(demand_queue))
+            for size, demand_queue in open_demand_dict.items()
+        }
+
+    def get_open_demand_queue(self, size: float) -> Deque[Tuple[int, str]]:
+        """
+        :return: 幅宽 size 未满足的需求队列，已满足的需求先从队首移除
+        """
+        demand_queue = self.open_demand_dict.get(size, deque())
+        while demand_queue and self.input_data.demand_dict[demand_queue[0][1]][size].amount < 1e-4:
+            demand_queue.popleft()
+        return demand_queue
+
+    def fill(self, supply: do.Supply, demand: do.Demand, amount: float):
+        """
+        用供应满足需求，并记录变化的供应与需求
+        """
+        self.open_size_dict[supply.size].fill(supply=supply, demand=demand, amount=amount)
+        self.mark_changed(supply=supply, demand=demand)
+
+    def mark_changed(self, supply: do.Supply = None, demand: do.Demand = None):
+        if supply is not None:
+            self.changed_supply_dict[id(supply)] = supply
+        if demand is not None:
+            self.changed_demand_dict[id(demand)] = demand
+
+    def pop_changed(self) -> Tuple[List[do.Supply], List[do.Demand]]:
+        """
+        :return: 上次取出后新增或变化的供应与需求，取出后清空
+        """
+        supply_list = list(self.changed_supply_dict.values())
+        demand_list = list(self.changed_demand_dict.values())
+        self.changed_supply_dict = dict()
+        self.changed_demand_dict = dict()
+        return supply_list, demand_list
+
+    def register_supply(self, supply: do.Supply):
+        """
+        将有剩余的供应加入对应幅宽的小顶堆，堆按 (供应日期序号, 加入顺序) 排序
+        """
+        key = (supply.date, supply.pattern_id, supply.size)
+        if key in self.open_supply_key_set or supply.amount < 1e-2:
+            return
+        heapq.heappush(
+            self.open_supply_dict[supply.size],
+            (self.date_rank_dict[supply.date], next(self.supply_sequence), key)
+        )
+        self.open_supply_key_set.add(key)
+
+    def generate_supply_by_date(self, date: datetime.date):
         solution = self.solution_dict[date]
         supply_dict = dict()
         for pattern_id, pattern in solution.pattern_used_dict.items():
@@ -197,133 +365,139 @@ class ResultStorage:
                 )
                 supply_dict[(date, pattern_id, size)] = supply
         self.supply_dict.update(supply_dict)
+        for supply in supply_dict.values():
+            self.register_supply(supply=supply)
+            self.mark_changed(supply=supply)
 
     @timing.record_time_decorator(task_name="生成供应关系时长")
-    def generate_fulfillment_relationship_by_date(self, date: str):
+    def generate_fulfillment_relationship_by_date(self, date: datetime.date):
         """
-        满足当前日期的需求
+        满足当前日期的需求；补库时也按日期先后满足之后日期的需求
         :param date: 当前日期
         :return:
         """
         self.generate_supply_by_date(date=date)
-        supply_queue_by_size, demand_queue_by_size = self.generate_supply_and_demand_queue_by_size()
+        rank = self.date_rank_dict[date]
 
-        for size, demand_queue in demand_queue_by_size.items():
-            supply_queue = supply_queue_by_size.get(size, [])
-            if len(supply_queue) == 0:
+        for size, supply_heap in self.open_supply_dict.items():
+            if not supply_heap:
                 continue
-            for (demand_date, _) in demand_queue:
-                if (not self.input_data.whether_process_remain) and demand_date != date:
-                    continue
+            # 补库或多日联合求解时，供应可以提前满足之后日期的需求
+            if self.input_data.whether_process_remain or self.input_data.horizon_mode:
+                demand_queue = self.get_open_demand_queue(size=size)
+            else:
+                demand_queue = [(rank, date)] if size in self.input_data.demand_dict[date] else []
+
+            for (demand_rank, demand_date) in demand_queue:
                 demand = self.input_data.demand_dict[demand_date][size]
-                while demand.amount > 1e-4:
-                    if len(supply_queue) == 0:
+                while demand.amount > 1e-4 and supply_heap:
+                    supply_rank, _, key = supply_heap[0]
+                    if supply_rank > demand_rank:
                         break
-                    (supply_date, pattern_id, _) = supply_queue[0]
-                    if pd.to_datetime(supply_date) > pd.to_datetime(demand_date):
-                        break
-                    supply = self.supply_dict[(supply_date, pattern_id, size)]
+                    supply = self.supply_dict[key]
 
                     fill_amount = min(demand.amount, supply.amount)
 
-                    supply.demand_amount_dict[demand_date] = supply.demand_amount_dict.get(demand_date, 0) + fill_amount
-                    demand.supply_amount_dict[(supply_date, pattern_id)] = demand.supply_amount_dict.get(
-                        (supply_date, pattern_id), 0) + fill_amount
+                    self.fill(supply=supply, demand=demand, amount=fill_amount)
 
                     if supply.amount < 1e-2:
-                        supply_queue.pop(0)
+                        heapq.heappop(supply_heap)
+                        self.open_supply_key_set.discard(key)
 
-                if demand_date == date and demand.amount > 1e-4:
+                if demand_rank == rank and demand.amount > 1e-4:
                     logging.error("Demand of size: {} on date {} is not satisfied in time: {}".format(
                         size, date, demand.amount
                     ))
-
-    def generate_supply_and_demand_queue_by_size(
-            self
-    ) -> Tuple[
-        Dict[float, List[do.Supply]]
-        , Dict[float, List[do.Demand]]
-    ]:
-        """
-        提前遍历好每个幅宽的 供应和需求， 按日期排序
-        :return: {幅宽：供应列表}， {幅宽：需求列表}
-        """
-        supply_queue_by_size = defaultdict(list)
-        demand_queue_by_size = defaultdict(list)
-
-        for (supply_date, pattern_id, size), supply in self.supply_dict.items():
-            if supply.amount < 1e-2:
-                continue
-            supply_queue_by_size[size].append((supply_date, pattern_id, size))
-
-        supply_queue_by_size = {
-            size: sorted(supply_queue, key=lambda x: pd.to_datetime(x[0]))
-            for size, supply_queue in supply_queue_by_size.items()
-        }
-
-        for date, dmd_dict in self.input_data.demand_dict.items():
-            for size, demand in dmd_dict.items():
-                if demand.amount < 1e-2:
-                    continue
-                demand_queue_by_size[size].append((date, size))
-        demand_queue_by_size = {
-            size: sorted(demand_queue, key=lambda x: pd.to_datetime(x[0]))
-            for size, demand_queue in demand_queue_by_size.items()
-        }
-        return supply_queue_by_size, demand_queue_by_size
+                if not supply_heap:
+                    break
 
     # endregion
 
     # region post_process
-    def generate_size_demand_dict(
-            self
-            , date: str
-    ) -> Dict[float, do.Size]:
-        """
-        提前生成字典，记录每个幅宽剩余的需求，按需求量进行排序
-        :param date: 日期
-        :return: 输入日期的每个幅宽对应的剩余需求
-        """
-        size_dict = dict()
-        for demand_date, demand_dict in self.input_data.demand_dict.items():
-            if demand_date <= date:
-                continue
-
-            for size, demand in demand_dict.items():
-                if size not in size_dict:
-                    size_do = do.Size(
-                        size=size
-                    )
-                else:
-                    size_do = size_dict[size]
-                size_do.demand_dict[demand_date] = demand
-                size_dict.update({size: size_do})
-        size_dict = dict(sorted(size_dict.items(), key=lambda x: x[1].demand_amount, reverse=True))
-        return size_dict
+    def get_future_demand_amount(self, size: float, rank: int) -> float:
+        """
+        幅宽的剩余需求总量减去不晚于当前日期的未满足需求，即之后日期的剩余需求
+        :param size: 幅宽
+        :param rank: 当前日期的序号
+        :return: 该幅宽在当前日期之后的剩余需求
+        """
+        size_do = self.open_size_dict.get(size)
+        if size_do is None:
+            return 0
+        past_amount = 0
+        for demand_rank, demand_date in self.get_open_demand_queue(size=size):
+            if demand_rank > rank:
+                break
+            past_amount += size_do.demand_dict[demand_date].amount
+        return size_do.demand_amount - past_amount
+
+    def get_future_demand_queue(self, size: float, rank: int) -> Deque[Tuple[int, datetime.date]]:
+        """
+        :param size: 幅宽
+        :param rank: 当前日期的序号
+        :return: 幅宽 size 中日期晚于当前日期的未满足需求队列（副本），补库时从队首依次满足并移除
+        """
+        return deque(itertools.dropwhile(lambda entry: entry[0] <= rank, self.get_open_demand_queue(size=size)))
 
     @timing.record_time_decorator(task_name="后处理时长")
-    def post_process(self, date: str):
-        self.post_process_remain(date=date)
-        self.sort_by_min_knife_change(date=date)
+    def post_process(self, date: datetime.date):
+        """
+        按顺序执行 global_params.csv 中启用的后处理阶段，并记录各阶段在该日期的耗时
+        :param date: 当前日期
+        """
+        okh = header.OutKpiHeader
+        stage_list = []
+        if self.input_data.whether_process_remain:
+            stage_list.append((okh.process_remain_time, self.post_process_remain))
+        if self.input_data.sort_knife_change:
+            # 补库会增加切割段，换刀排序需在其后进行
+            stage_list.append((okh.knife_change_time, self.sort_by_min_knife_change))
+
+        solution = self.solution_dict[date]
+        for stage_name, stage in stage_list:
+            st = time.perf_counter()
+            stage(date=date)
+            solution.stage_time_dict[stage_name] = time.perf_counter() - st
 
     @timing.record_time_decorator(task_name="后处理remain时长")
-    def post_process_remain(self, date: str):
+    def post_process_remain(self, date: datetime.date):
         """
         对当前日期的结果进行后处理，如果pattern有剩余，则从需求中取选择最高销量的
         :param date: 当前日期
         :return:
         """
-        size_dict = self.generate_size_demand_dict(date)
+        rank = self.date_rank_dict[date]
+        max_cut = self.input_data.max_cut
+        future_amount_dict = {
+            size: self.get_future_demand_amount(size=size, rank=rank) for size in self.open_size_dict
+        }
+        # 按之后日期的剩余需求量从大到小决定补库幅宽的先后，另按幅宽排序以便二分查找放得下的幅宽
+        priority_size_list = [
+            size for size, amount in sorted(future_amount_dict.items(), key=lambda x: x[1], reverse=True)
+            if amount >= 1
+        ]
+        priority_dict = {size: k for k, size in enumerate(priority_size_list)}
+        sorted_size_list = sorted(priority_size_list)
+        # 各幅宽晚于当前日期的未满足需求队列，首次用到时生成，之后只从队首前进
+        future_queue_dict: Dict[float, Deque[Tuple[int, datetime.date]]] = dict()
+
         solution = self.solution_dict[date]
         for pattern_id in solution.pattern_used_dict:
             pattern = solution.pattern_used_dict[pattern_id]
             current_cut = sum(v for k, v in pattern.mode.items())
-            # 如果该pattern还有remain，则从销量由大到小的size去fill
-            for size in size_dict:
-                size_do = size_dict[size]
-                total_demand_amount = size_do.demand_amount
-                while size <= pattern.remain and total_demand_amount >= 1:
-                    if current_cut > 4 or (current_cut == 4 and size != pattern.remain):
+            if current_cut > max_cut:
+                continue
+            # 只遍历放得下的幅宽，按销量由大到小从remain中fill
+            fit_size_list = sorted_size_list[:bisect.bisect_right(sorted_size_list, pattern.remain)]
+            for size in sorted(fit_size_list, key=priority_dict.get):
+                if current_cut > max_cut or not sorted_size_list or sorted_size_list[0] > pattern.remain:
+                    break
+                size_do = self.open_size_dict[size]
+                if size not in future_queue_dict:
+                    future_queue_dict[size] = self.get_future_demand_queue(size=size, rank=rank)
+                demand_queue = future_queue_dict[size]
+                while size <= pattern.remain and future_amount_dict[size] >= 1:
+                    if current_cut > max_cut or (current_cut == max_cut and size != pattern.remain):
                         break
                     # 继续从remain中cut出size大小的纸卷，提供 used_times 个
                     pattern_provide_amount = pattern.used_times
@@ -341,11 +515,11 @@ class ResultStorage:
                         supply.supply_amount += pattern_provide_amount
 
                     # update size_do and demand
-                    for demand_date in size_do.demand_dict:
-                        if pattern_provide_amount == 0:
-                            break
+                    while demand_queue and pattern_provide_amount > 0:
+                        demand_rank, demand_date = demand_queue[0]
                         demand = size_do.demand_dict[demand_date]
                         if demand.amount < 1e-4:
+                            demand_queue.popleft()
                             continue
                         fill_amount = min(demand.amount, pattern_provide_amount)
                         pattern_provide_amount -= fill_amount
@@ -353,27 +527,68 @@ class ResultStorage:
                         logging.info("Provide size: {} on demand date: {} with amount: {} on date {} in advance".format(
                             size, demand_date, fill_amount, date
                         ))
-                        # update demand
-                        demand.supply_amount_dict[(date, pattern_id)] = demand.supply_amount_dict.get(
-                            (date, pattern_id), 0) + fill_amount
-                        # update supply
-                        supply.demand_amount_dict[demand_date] = supply.demand_amount_dict.get(demand_date,
-                                                                                               0) + fill_amount
+                        # update demand, supply and size_do
+                        self.fill(supply=supply, demand=demand, amount=fill_amount)
+                        future_amount_dict[size] -= fill_amount
                     # update supply dict
                     self.supply_dict.update({(date, pattern_id, size): supply})
+                    self.register_supply(supply=supply)
+                    self.mark_changed(supply=supply)
                     # update pattern and pattern.remain will update syn-chronically
                     pattern.mode[size] = pattern.mode.get(size, 0) + 1
                     pattern.added_cuts.append(size)
                     logging.info("Add one cut in pattern: {} with size {} on date {}".format(
                         pattern_id, size, date))
-                    current_cut = sum(v for k, v in pattern.mode.items())
-                    total_demand_amount = size_do.demand_amount
+                    current_cut += 1
+
+                if future_amount_dict[size] < 1:
+                    index = bisect.bisect_left(sorted_size_list, size)
+                    if index < len(sorted_size_list) and sorted_size_list[index] == size:
+                        del sorted_size_list[index]
 
     @timing.record_time_decorator(task_name="最小化换刀时长")
-    def sort_by_min_knife_change(self, date: str):
+    def sort_by_min_knife_change(self, date: datetime.date):
         solution = self.solution_dict[date]
-        min_change, corresponding_path = solution.get_min_knife_change()
-        solution.resort_pattern(update_key=corresponding_path)
+        min_change, corresponding_path = solution.get_min_knife_change(
+            time_limit=self.input_data.knife_change_time_limit,
+            exact_limit=self.input_data.knife_change_exact_limit)
+        id_map = solution.resort_pattern(update_key=corresponding_path)
+        self.remap_pattern_id(date=date, id_map=id_map)
         solution.knife_change_times = min_change
 
+    def remap_pattern_id(self, date: datetime.date, id_map: Dict[int, int]):
+        """
+        方案重新编号后，同步更新该日期的供应及其满足的需求中记录的 pattern_id
+        :param date: 当前日期
+        :param id_map: {原 pattern_id：新 pattern_id}
+        """
+        key_map = dict()
+        supply_list = [supply for key, supply in self.supply_dict.items() if key[0] == date]
+        # 先全部删除再插入，避免新旧编号冲突
+        for supply in supply_list:
+            del self.supply_dict[(date, supply.pattern_id, supply.size)]
+        for supply in supply_list:
+            old_key = (date, supply.pattern_id, supply.size)
+            supply.pattern_id = id_map[supply.pattern_id]
+            key_map[old_key] = (date, supply.pattern_id, supply.size)
+            self.supply_dict[key_map[old_key]] = supply
+
+        demand_set = {
+            (demand_date, supply.size) for supply in supply_list for demand_date in supply.demand_amount_dict
+        }
+        for demand_date, size in demand_set:
+            demand = self.input_data.demand_dict[demand_date][size]
+            demand.supply_amount_dict = {
+                ((supply_date, id_map[pattern_id]) if supply_date == date else (supply_date, pattern_id)): amount
+                for (supply_date, pattern_id), amount in demand.supply_amount_dict.items()
+            }
+            self.mark_changed(demand=demand)
+
+        # 堆中的排序键 (日期序号, 加入顺序) 不变，只替换供应的 key
+        for size, supply_heap in self.open_supply_dict.items():
+            for idx, (rank, seq, key) in enumerate(supply_heap):
+                if key in key_map:
+                    supply_heap[idx] = (rank, seq, key_map[key])
+        self.open_supply_key_set = {key_map.get(key, key) for key in self.open_supply_key_set}
+
     # endregion
@@ -0,0 +1,86 @@
+import os
+import gzip
+import pickle
+import hashlib
+import zlib
+import logging
+from typing import List, Optional
+import pandas as pd
+
+
+def get_fingerprint(df_list: list) -> str:
+    """
+    输入表的指纹：列名与各行内容的哈希，用于判断检查点是否对应同一份输入
+    :param df_list: 输入表
+    """
+    sha = hashlib.sha256()
+    for df in df_list:
+        sha.update(repr(list(df.columns)).encode('utf-8'))
+        sha.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return sha.hexdigest()
+
+
+def save_pickle(path: str, content):
+    """
+    pickle 序列化并 gzip 压缩；先写临时文件再替换，中途退出不会留下损坏的文件
+    """
+    tmp_path = '{}.tmp'.format(path)
+    with gzip.open(tmp_path, 'wb', compresslevel=1) as f:
+        pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_pickle(path: str):
+    with gzip.open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class Checkpoint:
+    """
+    多日期求解的检查点：每个日期处理完成后，只把该日期的结果及新增或变化的供需状态作为一条记录追加到文件末尾，
+    每条记录单独 pickle 序列化并 gzip 压缩，检查点的读写量随日期数线性增长。
+    恢复时只接受输入指纹相同的检查点，末尾写了一半的记录被忽略。
+    """
+
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+
+    def start(self, record_list: List[dict] = None):
+        """
+        新建检查点文件，写入指纹及已有的记录（恢复时用于去掉末尾不完整的记录）
+        """
+        tmp_path = '{}.tmp'.format(self.path)
+        with gzip.open(tmp_path, 'wb', compresslevel=1) as f:
+            pickle.dump({'fingerprint': self.fingerprint}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for record in record_list or []:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def append(self, record: dict):
+        with gzip.open(self.path, 'ab', compresslevel=1) as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self) -> Optional[List[dict]]:
+        """
+        :return: 按日期先后保存的记录，检查点不存在或与当前输入不一致时返回 None
+        """
+        if not os.path.exists(self.path):
+            logging.warning("Checkpoint {} not found, start from the first date.".format(self.path))
+            return None
+        record_list = []
+        with gzip.open(self.path, 'rb') as f:
+            header = pickle.load(f)
+            if header.get('fingerprint') != self.fingerprint:
+                logging.warning("Checkpoint {} was saved for different input, start from the first date.".format(
+                    self.path))
+                return None
+            while True:
+                try:
+                    record_list.append(pickle.load(f))
+                except EOFError:
+                    break
+                except (OSError, zlib.error, pickle.UnpicklingError):
+                    logging.warning("Checkpoint {} ends with an incomplete record, ignore it.".format(self.path))
+                    break
+        return record_list
@@ -0,0 +1,29 @@
+class CutRule:
+    """
+    单个切割方案的可行性规则，与 SubProblem 中的约束保持一致：
+    1. 段数不超过 max_cut 时，剩余宽度不小于边损下限；
+    2. 段数为 max_cut + 1 时，不允许有剩余（剩余宽度在 [边损下限, 0] 之间）；
+    3. 考虑边损时，剩余宽度要么在 [边损下限, 边损上限] 之间作为边损，要么不小于余量下限作为余量。
+    """
+    tolerance = 1e-6
+
+    def __init__(self, input_data):
+        self.original_size = input_data.original_size
+        self.max_cut = input_data.max_cut
+        self.consider_waste = input_data.consider_waste
+        self.waste_low_limit = input_data.waste_low_limit if self.consider_waste else 0.0
+        self.waste_up_limit = input_data.waste_up_limit
+        self.remain_low_limit = input_data.remain_low_limit
+
+    @property
+    def max_piece_num(self):
+        return self.max_cut + 1
+
+    def is_feasible(self, piece_num: int, remain: float) -> bool:
+        if piece_num > self.max_piece_num or remain < self.waste_low_limit - self.tolerance:
+            return False
+        if piece_num == self.max_piece_num and remain > self.tolerance:
+            return False
+        if not self.consider_waste:
+            return True
+        return remain <= self.waste_up_limit + self.tolerance or remain >= self.remain_low_limit - self.tolerance
@@ -0,0 +1,58 @@
+from typing import List
+import numpy as np
+from . import field
+
+
+class DualStabilizer:
+    """
+    列生成的对偶稳定：不直接用主问题对偶值定价，而是在稳定中心附近取对偶值。
+    平滑（Wentges）：定价对偶值 = alpha * 稳定中心 + (1 - alpha) * 主问题对偶值；
+    盒子：把主问题对偶值投影到以稳定中心为中心、半径为 radius 的盒子内。
+    稳定中心取目前拉格朗日下界最好的对偶值。
+    """
+
+    def __init__(self, input_data, demand_list: List[float]):
+        self.method = input_data.dual_stabilization
+        self.alpha = input_data.dual_smoothing_alpha
+        self.radius = input_data.dual_box_radius
+        self.demand_array = np.asarray(demand_list, dtype=float)
+
+        self.center: np.ndarray = None
+        self.best_bound = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.method in (field.DualStabilization.smoothing, field.DualStabilization.box)
+
+    def get_separation_duals(self, duals: List[float]) -> List[float]:
+        """
+        :param duals: 主问题对偶值
+        :return: 用于定价的对偶值
+        """
+        if not self.enabled or self.center is None:
+            return list(duals)
+        dual_array = np.asarray(duals, dtype=float)
+        if self.method == field.DualStabilization.smoothing:
+            separation = self.alpha * self.center + (1 - self.alpha) * dual_array
+        else:
+            separation = np.clip(dual_array, self.center - self.radius, self.center + self.radius)
+        return separation.tolist()
+
+    def get_bound(self, duals: List[float], sub_obj: float) -> float:
+        """
+        对偶值 duals 下的拉格朗日下界：任一方案的对偶价值不超过 sub_obj，
+        故 duals / sub_obj 是对偶可行解，下界为 duals·demand / sub_obj
+        :param sub_obj: duals 下子问题的最优值
+        """
+        return float(np.dot(duals, self.demand_array)) / max(sub_obj, 1.0)
+
+    def update(self, duals: List[float], sub_obj: float):
+        """
+        定价后更新：下界改进时把稳定中心移到该对偶值
+        :param duals: 定价使用的对偶值
+        :param sub_obj: 该对偶值下子问题的最优值
+        """
+        bound = self.get_bound(duals=duals, sub_obj=sub_obj)
+        if self.center is None or bound > self.best_bound + 1e-9:
+            self.best_bound = max(self.best_bound, bound)
+            self.center = np.asarray(duals, dtype=float)
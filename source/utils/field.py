@@ -7,8 +7,55 @@ class ParamName:
     remain_low_limit = '余量下限'
     waste_up_limit = '边损上限'
     waste_low_limit = '边损下限'
+    persistent_master = '主问题增量更新'
+    sub_problem_method = '子问题求解方式'
+    column_num_per_iteration = '每轮生成列数'
+    n_jobs = '并行进程数'
+    reuse_pattern = '是否复用切割方案'
+    pattern_pool_file = '切割方案缓存文件'
+    rounding_gap_tolerance = '取整启发式容差'
+    solver_name = '求解器'
+    knife_change_time_limit = '换刀优化时间上限'
+    knife_change_exact_limit = '精确换刀排序上限'
+    sort_knife_change = '是否优化换刀顺序'
+    cg_max_iteration = '列生成最大迭代次数'
+    cg_time_limit = '列生成时间上限'
+    cg_bound_stop = '下界提前终止'
+    dual_stabilization = '对偶稳定方法'
+    dual_smoothing_alpha = '对偶平滑系数'
+    dual_box_radius = '对偶盒子半径'
+    init_pattern_method = '初始方案生成方式'
+    pattern_age_limit = '方案老化轮数'
+    horizon_mode = '是否多日联合求解'
+    horizon_window = '联合求解窗口日期数'
+    holding_cost = '库存持有成本'
+    output_format = '输出文件格式'
+    save_checkpoint = '是否保存检查点'
+    incremental_solve = '是否增量求解'
 
 
 class BoolCN:
     true = '是'
     false = '否'
+
+
+class SubProblemMethod:
+    mip = '整数规划'
+    branch_bound = '分支定界'
+
+
+class InitPatternMethod:
+    single = '单一幅宽'
+    greedy = '贪心'
+
+
+class DualStabilization:
+    none = '无'
+    smoothing = '平滑'
+    box = '盒子'
+
+
+class OutputFormat:
+    csv = 'csv'
+    parquet = 'parquet'
+    feather = 'feather'
@@ -5,3 +5,8 @@ OUT_KPI_FILE = 'kpiOut.csv'
 OUT_SUPPLY_FILE = 'supplyOut.csv'
 OUT_DEMAND_FILE = 'demandOut.csv'
 OUT_FULFILLMENT_FILE = 'fulfillmentOut.csv'
+OUT_CONVERGENCE_FILE = 'convergenceOut.csv'
+OUT_PROFILE_JSON_FILE = 'time_profile.json'
+OUT_PROFILE_CSV_FILE = 'time_profile.csv'
+CHECKPOINT_FILE = 'checkpoint.pkl.gz'
+SOLUTION_CACHE_FILE = 'solution_cache.pkl.gz'
@@ -42,9 +42,27 @@ class OutFulfillmentHeader:
     supply_amount = '供给数量'
 
 
+class OutConvergenceHeader:
+    date = '日期'
+    iteration = '迭代次数'
+    master_obj = '主问题目标值'
+    sub_obj = '子问题目标值'
+    lower_bound = '拉格朗日下界'
+    master_time = '主问题时长（秒）'
+    pricing_time = '子问题时长（秒）'
+    column_num = '方案数'
+    new_column_num = '新增方案数'
+
+
 class OutKpiHeader:
     date = '日期'
     original_used_times = '原始纸卷使用个数'
     pattern_num = '切割方案数量'
     running_time = '运行时间（秒）'
+    knife_change_times = '换刀次数'
+    column_generation_time = '列生成时长（秒）'
+    original_problem_time = '原问题时长（秒）'
+    fulfillment_time = '供需匹配时长（秒）'
+    process_remain_time = '补库时长（秒）'
+    knife_change_time = '换刀排序时长（秒）'
 
@@ -1,17 +1,91 @@
-from typing import Dict
+from typing import Dict, List
 from .. import do
+from . import field
+from .cut_rule import CutRule
 
 
-def init_pattern(demand_dict: Dict[float, do.Demand], og_size: float):
+def init_pattern(demand_dict: Dict[float, do.Demand], og_size: float,
+                 method: str = field.InitPatternMethod.single, cut_rule: CutRule = None):
+    """
+    生成列生成的初始方案：总是包含每种幅宽只切一段的方案，保证主问题可行；
+    贪心方式再加入单一幅宽切满的方案和按 FFD 混合切割的方案
+    :param demand_dict: {幅宽：需求}
+    :param og_size: 原始卷纸长度
+    :param method: 初始方案生成方式
+    :param cut_rule: 方案可行性规则，贪心方式必须提供
+    :return: {pattern_id：方案}
+    """
+    mode_list = [{size: 1} for size in demand_dict]
+    if method == field.InitPatternMethod.greedy:
+        mode_list += generate_homogeneous_mode_list(demand_dict=demand_dict, og_size=og_size, cut_rule=cut_rule)
+        mode_list += generate_ffd_mode_list(demand_dict=demand_dict, og_size=og_size, cut_rule=cut_rule)
+
     pattern_dict = {}
     pattern_id = 0
-    for size, demand in demand_dict.items():
+    mode_key_set = set()
+    for mode in mode_list:
+        mode_key = tuple(sorted(mode.items()))
+        if mode_key in mode_key_set:
+            continue
+        mode_key_set.add(mode_key)
         pattern = do.Pattern(
             pattern_id=pattern_id,
             original_size=og_size,
-            mode={size: 1}
+            mode=mode
         )
 
         pattern_dict.update({pattern_id: pattern})
         pattern_id += 1
     return pattern_dict
+
+
+def generate_homogeneous_mode_list(demand_dict: Dict[float, do.Demand], og_size: float,
+                                   cut_rule: CutRule) -> List[Dict[float, int]]:
+    """
+    每种幅宽在满足切割规则的前提下切尽可能多的段
+    """
+    mode_list = []
+    for size in demand_dict:
+        max_piece_num = min(cut_rule.max_piece_num, int((og_size - cut_rule.waste_low_limit) // size))
+        for piece_num in range(max_piece_num, 1, -1):
+            if cut_rule.is_feasible(piece_num=piece_num, remain=og_size - piece_num * size):
+                mode_list.append({size: piece_num})
+                break
+    return mode_list
+
+
+def generate_ffd_mode_list(demand_dict: Dict[float, do.Demand], og_size: float,
+                           cut_rule: CutRule) -> List[Dict[float, int]]:
+    """
+    First Fit Decreasing：按幅宽从大到小，把剩余需求依次装入卷纸，每个方案按剩余需求尽量多次使用
+    """
+    remain_demand_dict = {size: int(round(demand.amount)) for size, demand in demand_dict.items()}
+    size_list = sorted(demand_dict, reverse=True)
+    mode_list = []
+    while any(remain_demand_dict[size] > 0 for size in size_list):
+        piece_list = []
+        remain = og_size
+        for size in size_list:
+            while remain_demand_dict[size] > piece_list.count(size) and len(piece_list) < cut_rule.max_piece_num:
+                # 最后一段必须恰好切完
+                if size > remain - cut_rule.waste_low_limit + cut_rule.tolerance or \
+                        (len(piece_list) + 1 == cut_rule.max_piece_num and
+                         abs(remain - size) > cut_rule.tolerance):
+                    break
+                piece_list.append(size)
+                remain -= size
+
+        # 不满足边损规则时从最小的段开始去掉
+        while piece_list and not cut_rule.is_feasible(piece_num=len(piece_list), remain=remain):
+            remain += piece_list.pop()
+        if not piece_list:
+            break
+
+        mode = {}
+        for size in piece_list:
+            mode[size] = mode.get(size, 0) + 1
+        used_times = max(1, min(remain_demand_dict[size] // qty for size, qty in mode.items()))
+        for size, qty in mode.items():
+            remain_demand_dict[size] = max(0, remain_demand_dict[size] - qty * used_times)
+        mode_list.append(mode)
+    return mode_list
@@ -1,6 +1,9 @@
 import logging
 import os
 
+# 求解器日志输出的记录器名：不向根记录器传递，只写入日志文件
+SOLVER_OUTPUT_LOGGER_NAME = "solver_output"
+
 
 def setup_log(log_dir="", log_level=logging.INFO):
     """
@@ -37,4 +40,11 @@ def setup_log(log_dir="", log_level=logging.INFO):
     logger.addHandler(file_handler)
     logger.addHandler(console_handler)
 
+    # 求解器日志只写入文件：appsi 求解器会捕获 stdout/stderr，若再经控制台处理器输出会被重复捕获
+    # 重复调用时已有文件处理器则不再添加，避免求解器日志重复写入
+    solver_logger = logging.getLogger(SOLVER_OUTPUT_LOGGER_NAME)
+    solver_logger.propagate = False
+    if not any(isinstance(handler, logging.FileHandler) for handler in solver_logger.handlers):
+        solver_logger.addHandler(file_handler)
+
     return logger
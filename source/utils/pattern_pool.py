@@ -0,0 +1,87 @@
+import os
+import json
+import logging
+from typing import Dict, List, Set, Tuple
+from .cut_rule import CutRule
+from .. import do
+
+ModeKey = Tuple[Tuple[float, int], ...]
+
+
+class PatternPool:
+    """
+    跨日期、跨运行复用的切割方案池。
+    方案是否可行只取决于原始宽度、最大切割次数和边损参数，因此按这些参数分组保存；
+    每个日期开始时，取出所有幅宽都在当天需求中的方案作为主问题的初始列。
+    """
+
+    def __init__(self, input_data):
+        self.cut_rule = CutRule(input_data=input_data)
+        self.original_size = input_data.original_size
+        self.key = json.dumps([
+            input_data.original_size,
+            input_data.max_cut,
+            input_data.consider_waste,
+            self.cut_rule.waste_low_limit,
+            input_data.waste_up_limit,
+            input_data.remain_low_limit
+        ])
+        self.pool_dict: Dict[str, Set[ModeKey]] = {self.key: set()}
+
+    def __len__(self):
+        return len(self.pool_dict[self.key])
+
+    @staticmethod
+    def get_mode_key(mode: Dict[float, float]) -> ModeKey:
+        return tuple(sorted(
+            (float(size), int(round(qty))) for size, qty in mode.items() if qty >= 0.5
+        ))
+
+    def add(self, mode_list: List[Dict[float, float]]):
+        mode_set = self.pool_dict[self.key]
+        for mode in mode_list:
+            mode_key = self.get_mode_key(mode)
+            if not mode_key or mode_key in mode_set:
+                continue
+            piece_num = sum(qty for size, qty in mode_key)
+            remain = self.original_size - sum(size * qty for size, qty in mode_key)
+            if not self.cut_rule.is_feasible(piece_num=piece_num, remain=remain):
+                continue
+            mode_set.add(mode_key)
+
+    def seed(self, demand_dict: Dict[float, do.Demand]) -> List[Dict[float, int]]:
+        """
+        取出所有幅宽都在当天需求中的方案；单一幅宽切一段的方案已由 init_pattern 生成，不再重复
+        :param demand_dict: 当天需求
+        :return: 方案列表
+        """
+        size_set = set(demand_dict)
+        mode_list = []
+        for mode_key in self.pool_dict[self.key]:
+            if len(mode_key) == 1 and mode_key[0][1] == 1:
+                continue
+            if all(size in size_set for size, qty in mode_key):
+                mode_list.append(dict(mode_key))
+        return sorted(mode_list, key=lambda mode: sorted(mode.items()))
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            logging.info("pattern pool file {} not found, start with empty pool".format(path))
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        for key, mode_list in content.items():
+            mode_set = self.pool_dict.setdefault(key, set())
+            mode_set.update(
+                tuple((float(size), int(qty)) for size, qty in mode) for mode in mode_list
+            )
+        logging.info("loaded pattern pool: {}".format(len(self)))
+
+    def dump(self, path: str):
+        content = {
+            key: sorted([list(map(list, mode)) for mode in mode_set])
+            for key, mode_set in self.pool_dict.items()
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(content, f)
+        logging.info("dumped pattern pool: {}".format(len(self)))
@@ -1,19 +1,57 @@
 from .timing import record_time_decorator
 from .. import do
-from typing import Dict, List
+from typing import Dict, List, Set
 
 
 @record_time_decorator(task_name="update pattern时长")
 def pattern_update(pattern_dict: Dict[int, do.Pattern],
                    size_list: List[float],
-                   new_column: List[int], original_size:float):
-    new_pattern_mode = dict(zip(size_list, new_column))
-    pattern_id = len(pattern_dict)
-    new_pattern = do.Pattern(
-        pattern_id=pattern_id,
-        original_size=original_size,
-        mode=new_pattern_mode
-    )
-    pattern_dict.update({pattern_id: new_pattern})
+                   new_column_list: List[List[int]], original_size: float,
+                   pattern_key_set: Set[tuple] = None):
+    """
+    把新列加入 pattern_dict，与已有方案（或本批中之前的列）重复的列不加入
+    :param pattern_key_set: pattern_dict 中方案的 Pattern.key 集合，由调用方持有并在此更新；
+                            为 None 时根据 pattern_dict 临时生成
+    :return: 实际加入的新方案
+    """
+    if pattern_key_set is None:
+        pattern_key_set = {pattern.key for pattern in pattern_dict.values()}
+    # 方案可能被移除，编号取当前最大编号 + 1
+    pattern_id = max(pattern_dict) + 1 if pattern_dict else 0
+    new_pattern_list = []
+    for new_column in new_column_list:
+        new_pattern_mode = dict(zip(size_list, new_column))
+        new_pattern = do.Pattern(
+            pattern_id=pattern_id,
+            original_size=original_size,
+            mode=new_pattern_mode
+        )
+        if new_pattern.key in pattern_key_set:
+            continue
+        pattern_key_set.add(new_pattern.key)
+        pattern_dict.update({pattern_id: new_pattern})
+        new_pattern_list.append(new_pattern)
+        pattern_id += 1
+    return new_pattern_list
 
 
+def remove_aged_pattern(pattern_dict: Dict[int, do.Pattern],
+                        pattern_age_dict: Dict[int, int],
+                        age_limit: int,
+                        protected_id_set: Set[int],
+                        pattern_key_set: Set[tuple] = None) -> List[int]:
+    """
+    移除连续 age_limit 轮在主问题中取值为 0 的方案，protected_id_set 中的方案（如初始方案）不移除
+    :param pattern_age_dict: {pattern_id：连续取值为 0 的轮数}
+    :return: 被移除的 pattern_id
+    """
+    removed_id_list = [
+        pattern_id for pattern_id, age in pattern_age_dict.items()
+        if age >= age_limit and pattern_id not in protected_id_set
+    ]
+    for pattern_id in removed_id_list:
+        pattern = pattern_dict.pop(pattern_id)
+        del pattern_age_dict[pattern_id]
+        if pattern_key_set is not None:
+            pattern_key_set.discard(pattern.key)
+    return removed_id_list
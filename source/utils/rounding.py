@@ -0,0 +1,104 @@
+import math
+from typing import Dict, Optional
+from .. import do
+
+
+def get_covered_amount(pattern: do.Pattern, residual_dict: Dict[float, float]) -> float:
+    return sum(min(qty, residual_dict[size]) for size, qty in pattern.mode.items()
+               if size in residual_dict and residual_dict[size] > 1e-6)
+
+
+def repair_residual(
+        demand_dict: Dict[float, do.Demand],
+        pattern_dict: Dict[int, do.Pattern],
+        x_dict: Dict[int, int],
+        priority_dict: Dict[int, float],
+        max_used: int = None
+):
+    """
+    贪心修补：反复选择能覆盖最多剩余需求的方案，使用次数加一，直至需求全部满足
+    :param priority_dict: 覆盖量相同时优先选择的方案（如线性解的小数部分更大者）
+    :param max_used: 方案使用上限，达到上限的方案不再选择
+    """
+    residual_dict = {
+        size: demand.amount - sum(pattern_dict[j].mode.get(size, 0) * times for j, times in x_dict.items())
+        for size, demand in demand_dict.items()
+    }
+    while any(residual > 1e-6 for residual in residual_dict.values()):
+        candidate_list = [j for j in pattern_dict if max_used is None or x_dict.get(j, 0) < max_used]
+        if not candidate_list:
+            break
+        best_j = max(
+            candidate_list,
+            key=lambda j: (get_covered_amount(pattern_dict[j], residual_dict), priority_dict.get(j, 0))
+        )
+        if get_covered_amount(pattern_dict[best_j], residual_dict) < 1e-6:
+            break
+        x_dict[best_j] = x_dict.get(best_j, 0) + 1
+        for size, qty in pattern_dict[best_j].mode.items():
+            if size in residual_dict:
+                residual_dict[size] -= qty
+    return residual_dict
+
+
+def remove_surplus(
+        demand_dict: Dict[float, do.Demand],
+        pattern_dict: Dict[int, do.Pattern],
+        x_dict: Dict[int, int],
+        min_pattern_used_num: int
+):
+    """
+    在保证需求满足的前提下，从产出最少的方案开始减少使用次数
+    """
+    surplus_dict = {
+        size: sum(pattern_dict[j].mode.get(size, 0) * times for j, times in x_dict.items()) - demand.amount
+        for size, demand in demand_dict.items()
+    }
+    for j in sorted(x_dict, key=lambda k: pattern_dict[k].useful_size):
+        mode = {size: qty for size, qty in pattern_dict[j].mode.items() if size in surplus_dict and qty > 0}
+        while x_dict[j] > 0:
+            # 使用次数不能低于下限，到达下限时只能整体去掉
+            step = 1 if x_dict[j] > min_pattern_used_num else x_dict[j]
+            if not all(surplus_dict[size] >= qty * step - 1e-6 for size, qty in mode.items()):
+                break
+            x_dict[j] -= step
+            for size, qty in mode.items():
+                surplus_dict[size] -= qty * step
+    return {j: times for j, times in x_dict.items() if times > 0}
+
+
+def round_lp_solution(
+        demand_dict: Dict[float, do.Demand],
+        pattern_dict: Dict[int, do.Pattern],
+        lp_x_dict: Dict[int, float],
+        min_pattern_used_num: int = None,
+        max_pattern_used_num: int = None
+) -> Optional[Dict[int, int]]:
+    """
+    取整启发式：分别尝试 线性解向下取整 + 贪心修补 和 线性解向上取整，
+    满足方案使用下限后去掉多余的使用次数，取使用原始卷纸更少者
+    :param lp_x_dict: 线性松弛解 {pattern_id: 使用次数}
+    :param min_pattern_used_num: 方案使用下限
+    :param max_pattern_used_num: 方案使用上限（原问题中 x <= M * 是否使用 的 M），为空则不限
+    :return: 整数解 {pattern_id: 使用次数}；各候选都无法在上限内满足需求时返回 None
+    """
+    min_used = min_pattern_used_num if min_pattern_used_num is not None and min_pattern_used_num > 1 else 1
+    fraction_dict = {j: x - math.floor(x + 1e-6) for j, x in lp_x_dict.items()}
+
+    candidate_list = []
+    for rounding in (lambda x: math.floor(x + 1e-6), lambda x: math.ceil(x - 1e-6)):
+        x_dict = {j: int(rounding(x)) for j, x in lp_x_dict.items() if rounding(x) > 0}
+        if max_pattern_used_num is not None:
+            x_dict = {j: min(times, max_pattern_used_num) for j, times in x_dict.items()}
+        residual_dict = repair_residual(demand_dict=demand_dict, pattern_dict=pattern_dict, x_dict=x_dict,
+                                        priority_dict=fraction_dict, max_used=max_pattern_used_num)
+        if any(residual > 1e-6 for residual in residual_dict.values()):
+            continue
+        x_dict = {j: max(times, min_used) for j, times in x_dict.items() if times > 0}
+        candidate_list.append(
+            remove_surplus(demand_dict=demand_dict, pattern_dict=pattern_dict, x_dict=x_dict,
+                           min_pattern_used_num=min_used)
+        )
+    if not candidate_list:
+        return None
+    return min(candidate_list, key=lambda x_dict: sum(x_dict.values()))
@@ -0,0 +1,170 @@
+import time
+import numpy as np
+from typing import List, Tuple
+
+# held_karp 状态表的内存上限（字节）
+MAX_EXACT_MEMORY = 256 * 1024 * 1024
+
+
+def get_path_cost(path: List[int], cost: List[List[int]]) -> int:
+    return sum(cost[path[k]][path[k + 1]] for k in range(len(path) - 1))
+
+
+def nearest_neighbour(cost_matrix: np.ndarray, start: int) -> List[int]:
+    """
+    从 start 出发，每次走到代价最小的未访问节点
+    """
+    n = cost_matrix.shape[0]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    path = [start]
+    current = start
+    for _ in range(n - 1):
+        row = np.where(visited, np.iinfo(np.int64).max, cost_matrix[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        path.append(current)
+    return path
+
+
+def two_opt(path: List[int], cost: List[List[int]], deadline: float) -> bool:
+    """
+    开放路径上的 2-opt：反转 path[i..j]，只改变两端的两条边
+    :return: 是否有改进
+    """
+    n = len(path)
+    improved = False
+    for i in range(n - 1):
+        if time.perf_counter() > deadline:
+            break
+        for j in range(i + 1, n):
+            delta = 0
+            if i > 0:
+                delta += cost[path[i - 1]][path[j]] - cost[path[i - 1]][path[i]]
+            if j < n - 1:
+                delta += cost[path[i]][path[j + 1]] - cost[path[j]][path[j + 1]]
+            if delta < 0:
+                path[i:j + 1] = reversed(path[i:j + 1])
+                improved = True
+    return improved
+
+
+def or_opt(path: List[int], cost: List[List[int]], deadline: float, max_segment_len: int = 3) -> bool:
+    """
+    Or-opt：把长度不超过 max_segment_len 的一段（正向或反向）移到路径的其他位置
+    :return: 是否有改进
+    """
+
+    def edge(a, b):
+        return 0 if a is None or b is None else cost[a][b]
+
+    n = len(path)
+    improved = False
+    for segment_len in range(1, min(max_segment_len, n - 1) + 1):
+        i = 0
+        while i + segment_len <= len(path):
+            if time.perf_counter() > deadline:
+                return improved
+            segment = path[i:i + segment_len]
+            prev = path[i - 1] if i > 0 else None
+            nxt = path[i + segment_len] if i + segment_len < n else None
+            remove_gain = edge(prev, segment[0]) + edge(segment[-1], nxt) - edge(prev, nxt)
+            rest = path[:i] + path[i + segment_len:]
+
+            best_delta, best_move = 0, None
+            for k in range(len(rest) + 1):
+                a = rest[k - 1] if k > 0 else None
+                b = rest[k] if k < len(rest) else None
+                for reverse in (False, True):
+                    if k == i and not reverse:
+                        continue
+                    first, last = (segment[-1], segment[0]) if reverse else (segment[0], segment[-1])
+                    delta = edge(a, first) + edge(last, b) - edge(a, b) - remove_gain
+                    if delta < best_delta:
+                        best_delta, best_move = delta, (k, reverse)
+            if best_move is not None:
+                k, reverse = best_move
+                path[:] = rest[:k] + (segment[::-1] if reverse else segment) + rest[k:]
+                improved = True
+            i += 1
+    return improved
+
+
+def held_karp(cost_matrix: np.ndarray) -> Tuple[int, List[int]]:
+    """
+    状态压缩动态规划求开放路径的精确最优解：
+    dp[mask, j] 表示访问过 mask 中的节点且停在 j 的最小代价，按 mask 中的节点数逐层计算，
+    每层对终点 j 向量化地取 min over 上一节点
+    :param cost_matrix: n×n 代价矩阵
+    :return: 路径总代价，节点序号列表
+    """
+    n = cost_matrix.shape[0]
+    if n == 0:
+        return 0, []
+    cost = cost_matrix.astype(np.int64)
+    infinity = np.iinfo(np.int64).max // 4
+    mask_num = 1 << n
+    dp = np.full((mask_num, n), infinity, dtype=np.int64)
+    parent = np.full((mask_num, n), -1, dtype=np.int8)
+    bit_list = [1 << j for j in range(n)]
+    dp[bit_list, range(n)] = 0
+
+    mask_array = np.arange(mask_num)
+    bit_count = np.zeros(mask_num, dtype=np.int8)
+    for j in range(n):
+        bit_count += ((mask_array >> j) & 1).astype(np.int8)
+
+    for layer in range(2, n + 1):
+        layer_mask = mask_array[bit_count == layer]
+        for j in range(n):
+            mask = layer_mask[(layer_mask & bit_list[j]) != 0]
+            prev_cost = dp[mask ^ bit_list[j]] + cost[:, j]
+            prev = np.argmin(prev_cost, axis=1)
+            dp[mask, j] = prev_cost[np.arange(len(mask)), prev]
+            parent[mask, j] = prev
+
+    mask = mask_num - 1
+    last = int(np.argmin(dp[mask]))
+    min_cost = int(dp[mask, last])
+    path = [last]
+    while parent[mask, last] >= 0:
+        mask, last = mask ^ bit_list[last], int(parent[mask, last])
+        path.append(last)
+    return min_cost, path[::-1]
+
+
+def held_karp_memory(n: int) -> int:
+    """
+    held_karp 的 dp 与 parent 表占用的字节数
+    """
+    return (1 << n) * n * (8 + 1)
+
+
+def get_min_cost_path(cost_matrix: np.ndarray, time_limit: float = 1.0,
+                      exact_limit: int = 0) -> Tuple[int, List[int]]:
+    """
+    求经过所有节点一次、总代价最小的开放路径：
+    节点数不超过 exact_limit 且内存不超过 MAX_EXACT_MEMORY 时用 held_karp 求精确解；
+    否则先从每个节点出发做最近邻，取最好的路径，再在时间上限内交替做 2-opt 和 Or-opt 直至无改进
+    :param cost_matrix: n×n 对称代价矩阵
+    :param time_limit: 改进阶段的时间上限（秒）
+    :param exact_limit: 精确求解的节点数上限
+    :return: 路径总代价，节点序号列表
+    """
+    n = cost_matrix.shape[0]
+    if n == 0:
+        return 0, []
+    if n <= exact_limit and held_karp_memory(n) <= MAX_EXACT_MEMORY:
+        return held_karp(cost_matrix=cost_matrix)
+    cost = cost_matrix.tolist()
+    deadline = time.perf_counter() + time_limit
+
+    best_path = min(
+        (nearest_neighbour(cost_matrix=cost_matrix, start=start) for start in range(n)),
+        key=lambda path: get_path_cost(path=path, cost=cost)
+    )
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = two_opt(path=best_path, cost=cost, deadline=deadline)
+        improved = or_opt(path=best_path, cost=cost, deadline=deadline) or improved
+    return get_path_cost(path=best_path, cost=cost), best_path
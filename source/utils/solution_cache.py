@@ -0,0 +1,81 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, List
+from .checkpoint import save_pickle, load_pickle
+from . import field
+
+# 只影响后处理或输出、不影响求解结果的参数，不计入指纹
+POST_PROCESS_PARAM_LIST = [
+    field.ParamName.whether_process_remain,
+    field.ParamName.n_jobs,
+    field.ParamName.pattern_pool_file,
+    field.ParamName.knife_change_time_limit,
+    field.ParamName.knife_change_exact_limit,
+    field.ParamName.sort_knife_change,
+    field.ParamName.output_format,
+    field.ParamName.save_checkpoint,
+    field.ParamName.incremental_solve
+]
+
+
+class SolutionCache:
+    """
+    增量求解的解缓存：以 (求解参数, 各日期求解时的剩余需求) 的指纹为键，保存列生成 + 原问题的解。
+    重新运行时指纹相同的日期（或多日联合求解的窗口）直接复用缓存的解，只重新进行供需匹配和后处理；
+    某日期需求变化并通过补库影响之后日期的剩余需求时，之后日期的指纹随之变化而重新求解。
+    缓存文件只保留本次运行用到的解。
+    """
+
+    def __init__(self, path: str, param_dict: Dict[str, object]):
+        """
+        :param path: 缓存文件路径
+        :param param_dict: {参数名：参数值}
+        """
+        self.path = path
+        self.param_fingerprint = json.dumps(
+            sorted((str(name), str(value)) for name, value in param_dict.items()
+                   if name not in POST_PROCESS_PARAM_LIST),
+            ensure_ascii=False
+        )
+        self.cache_dict: Dict[str, List[dict]] = dict()
+        self.used_cache_dict: Dict[str, List[dict]] = dict()
+        self.hit_num = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            logging.info("Solution cache {} not found, solve all dates.".format(self.path))
+            return
+        self.cache_dict = load_pickle(path=self.path)
+        logging.info("loaded solution cache: {}".format(len(self.cache_dict)))
+
+    def dump(self):
+        save_pickle(path=self.path, content=self.used_cache_dict)
+        logging.info("dumped solution cache: {}, reused: {}".format(len(self.used_cache_dict), self.hit_num))
+
+    def get_key(self, date_demand_dict: dict) -> str:
+        """
+        :param date_demand_dict: {日期：{幅宽：需求}}，按求解时的剩余需求计算指纹
+        :return: 指纹
+        """
+        sha = hashlib.sha256(self.param_fingerprint.encode('utf-8'))
+        for date, demand_dict in date_demand_dict.items():
+            sha.update(repr((
+                str(date), [(float(size), float(demand.amount)) for size, demand in demand_dict.items()]
+            )).encode('utf-8'))
+        return sha.hexdigest()
+
+    def get(self, key: str) -> List[dict]:
+        """
+        :return: 各日期的解 [{date, solution, size_list, mode_list}]，没有缓存时返回 None
+        """
+        entry_list = self.cache_dict.get(key)
+        if entry_list is not None:
+            self.hit_num += 1
+            self.used_cache_dict[key] = entry_list
+        return entry_list
+
+    def add(self, key: str, entry_list: List[dict]):
+        self.cache_dict[key] = entry_list
+        self.used_cache_dict[key] = entry_list
@@ -0,0 +1,82 @@
+import os
+import pandas as pd
+from . import field
+
+FILE_EXTENSION_DICT = {
+    field.OutputFormat.csv: '.csv',
+    field.OutputFormat.parquet: '.parquet',
+    field.OutputFormat.feather: '.feather'
+}
+
+
+def get_output_path(output_folder: str, file_name: str, output_format: str) -> str:
+    """
+    :param file_name: 输出文件名，如 solutionOut.csv，扩展名按输出格式替换
+    :return: 输出文件路径
+    """
+    if output_format not in FILE_EXTENSION_DICT:
+        raise ValueError("Unsupported output format: {}".format(output_format))
+    return '{}{}{}'.format(output_folder, os.path.splitext(file_name)[0], FILE_EXTENSION_DICT[output_format])
+
+
+def write_table(df: pd.DataFrame, path: str, output_format: str):
+    """
+    一次性写出整张表
+    """
+    if output_format == field.OutputFormat.csv:
+        df.to_csv(path, index=False)
+    elif output_format == field.OutputFormat.parquet:
+        df.to_parquet(path, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(path)
+
+
+class TableWriter:
+    """
+    按批追加写出一张表：每个日期完成后写出该日期的行，不必等全部日期求解完。
+    csv 每批直接追加到文件末尾；parquet 每批为一个 row group，feather 为 Arrow IPC 文件，每批为一个 record batch，
+    两者在 close 时写入文件尾，因此程序异常退出时需要调用 close 才能读取。
+    parquet 与 feather 依赖 pyarrow，仅在使用时导入。
+    """
+
+    def __init__(self, path: str, output_format: str, columns: list):
+        self.path = path
+        self.output_format = output_format
+        self.columns = columns
+        self.row_num = 0
+
+        self.schema = None
+        self.writer = None
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if self.output_format == field.OutputFormat.csv:
+            df.to_csv(self.path, mode='w' if self.row_num == 0 else 'a', header=self.row_num == 0, index=False)
+        else:
+            self.write_arrow(df)
+        self.row_num += len(df)
+
+    def write_arrow(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        if self.writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.schema = table.schema
+            if self.output_format == field.OutputFormat.parquet:
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.path, self.schema)
+        else:
+            # 之后的批次按第一批的字段类型写出，避免批次间类型不一致
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        elif self.row_num == 0:
+            # 没有任何行时仍写出只有表头的空表
+            write_table(df=pd.DataFrame(columns=self.columns), path=self.path, output_format=self.output_format)
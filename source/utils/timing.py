@@ -1,40 +1,124 @@
+import datetime
+import os
+import csv
+import json
 import time
 import logging
 import functools
+import threading
+import contextlib
+import contextvars
+from collections import defaultdict
+from typing import Dict, List, Tuple, Optional
+import numpy as np
+from . import filename
 
-# 定义全局变量用于存储任务及其相应的时间
-tasks = []
 
+class Profiler:
+    """
+    按 (任务名, 日期) 记录耗时，汇总 count/total/min/max/p95；
+    每个 Context 持有一个实例，子进程的实例随结果返回后合并到主进程
+    """
 
-# 函数用于添加任务及其相应的时间到全局变量中
-def add_task(task_name: str, time_taken: float):
-    global tasks
-    tasks.append((task_name, time_taken))
+    def __init__(self):
+        self.time_dict: Dict[Tuple[str, Optional[datetime.date]], List[float]] = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'time_dict': dict(self.time_dict)}
+
+    def __setstate__(self, state):
+        self.time_dict = defaultdict(list, state['time_dict'])
+        self.lock = threading.Lock()
+
+    def add(self, task_name: str, time_taken: float, date: datetime.date = None):
+        with self.lock:
+            self.time_dict[(task_name, date)].append(time_taken)
+
+    def merge(self, other: 'Profiler'):
+        with self.lock:
+            for key, time_list in other.time_dict.items():
+                self.time_dict[key].extend(time_list)
+
+    def summary(self, by_date: bool = True) -> List[dict]:
+        """
+        :param by_date: 是否按日期分别汇总，否则只按任务名汇总
+        :return: 每个任务（及日期）一条汇总记录
+        """
+        group_dict = defaultdict(list)
+        for (task_name, date), time_list in self.time_dict.items():
+            group_dict[(task_name, date if by_date else None)].extend(time_list)
+
+        record_lt = []
+        for (task_name, date), time_list in group_dict.items():
+            time_array = np.asarray(time_list)
+            record_lt.append({
+                'task': task_name,
+                'date': None if date is None else str(date),
+                'count': len(time_array),
+                'total': round(float(time_array.sum()), 6),
+                'min': round(float(time_array.min()), 6),
+                'max': round(float(time_array.max()), 6),
+                'p95': round(float(np.percentile(time_array, 95)), 6)
+            })
+        return record_lt
+
+    def dump_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'by_task': self.summary(by_date=False),
+                'by_date': self.summary(by_date=True)
+            }, file, ensure_ascii=False, indent=2)
+
+    def dump_csv(self, path: str):
+        record_lt = self.summary(by_date=True)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=['task', 'date', 'count', 'total', 'min', 'max', 'p95'])
+            writer.writeheader()
+            writer.writerows(record_lt)
+
+    def dump(self, output_folder: str):
+        self.dump_json(os.path.join(output_folder, filename.OUT_PROFILE_JSON_FILE))
+        self.dump_csv(os.path.join(output_folder, filename.OUT_PROFILE_CSV_FILE))
+
+
+# 当前生效的 profiler 与日期，未设置 profiler 时只计时不记录
+current_profiler: contextvars.ContextVar = contextvars.ContextVar('current_profiler', default=None)
+current_date: contextvars.ContextVar = contextvars.ContextVar('current_date', default=None)
+
+
+@contextlib.contextmanager
+def use_profiler(profiler: Profiler):
+    token = current_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        current_profiler.reset(token)
+
+
+@contextlib.contextmanager
+def date_scope(date: datetime.date):
+    token = current_date.set(date)
+    try:
+        yield
+    finally:
+        current_date.reset(token)
 
 
 def record_time_decorator(task_name: str):
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            st = time.time()
+            st = time.perf_counter()
             # 调用原函数
             result = func(*args, **kwargs)
-            ed = time.time()
-            total_time = round(ed - st, 4)
-            logging.info('{}: {}'.format(task_name, total_time))
-            add_task(task_name=task_name, time_taken=total_time)
+            time_taken = time.perf_counter() - st
+            profiler = current_profiler.get()
+            if profiler is not None:
+                profiler.add(task_name=task_name, time_taken=time_taken, date=current_date.get())
+            logging.debug('{}: {}'.format(task_name, round(time_taken, 4)))
             return result
 
         return wrapper
 
     return decorator
-
-
-def out_profile(output_folder: str):
-    # 打开文本文件，准备写入
-    with open("{}time_profile.txt".format(output_folder), "w") as file:
-        # 写入任务及其相应的时间
-        for task, time_taken in tasks:
-            file.write(f"{task}: {time_taken}\n")
-
-    file.close()